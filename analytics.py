@@ -0,0 +1,200 @@
+# FC723 Project – Seat Booking Application
+
+# Fleet-wide seat analytics with NumPy.
+
+# The status codes of many seat maps (see seat_map.py) are copied into one NumPy array of shape
+# (flights, rows, columns), and every statistic is computed on the whole array at once instead of
+# looping over the seats of every flight in Python. All flights in one array use the same layout.
+#
+# NumPy is only needed for this module; the booking applications do not use it.
+#
+#     python analytics.py [flights]     compare the speed with a loop over every seat
+
+import random
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from layouts import get_template
+from seat_codec import get_codec
+from seat_map import FREE, BOOKED, SEAT_CLASSES, SeatMap
+
+# Revenue zones of the standard layout: name -> (first row, last row, fare per booked seat)
+REVENUE_ZONES = {
+    "front": (1, 10, 180.0),
+    "middle": (11, 40, 120.0),
+    "rear": (41, 80, 90.0),
+}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("analytics.py needs NumPy: pip install numpy")
+
+
+def seat_states(seat_maps):
+    """
+    Returns the status codes of seat maps as a uint8 array of shape (flights, rows, columns).
+    Raises ValueError if no seat maps are given or they do not all use the same layout.
+    """
+    _require_numpy()
+    seat_maps = list(seat_maps)
+    if not seat_maps:
+        raise ValueError("No seat maps given")
+    template = seat_maps[0].template
+    if any(seat_map.template is not template for seat_map in seat_maps):
+        raise ValueError("All seat maps must use the same layout")
+    codes = b"".join([seat_map.codes() for seat_map in seat_maps])
+    return np.frombuffer(codes, dtype=np.uint8).reshape(len(seat_maps), template.rows,
+                                                        len(template.columns))
+
+
+def inventory_states(inventory, flight_ids):
+    """
+    Returns the seat states of some flights of a FlightInventory, in the order given.
+    """
+    return seat_states([inventory.cabin(flight_id) for flight_id in flight_ids])
+
+
+def _ratio(part, whole):
+    # Load factors, with 0 where there are no bookable seats
+    return np.divide(part, whole, out=np.zeros(np.shape(part)), where=np.asarray(whole) > 0)
+
+
+def occupancy(states):
+    """
+    Returns the free and booked seats and the load factor of every flight, as arrays.
+    """
+    free = (states == FREE).sum(axis=(1, 2))
+    booked = (states == BOOKED).sum(axis=(1, 2))
+    return {"free": free, "booked": booked, "load_factor": _ratio(booked, free + booked)}
+
+
+def load_factor_by_row_band(states, band=10):
+    """
+    Returns the load factor of every band of band rows over all flights,
+    as a dictionary keyed by the row range, e.g. {"1-10": 0.82, "11-20": 0.64, ...}.
+    """
+    # Adding up whole (rows, columns) planes flight by flight and only then the columns of each row
+    # is several times faster than reducing over the flight and column axes together
+    booked = (states == BOOKED).sum(axis=0, dtype=np.int64).sum(axis=1)
+    bookable = booked + (states == FREE).sum(axis=0, dtype=np.int64).sum(axis=1)
+    starts = np.arange(0, states.shape[1], band)
+    factors = _ratio(np.add.reduceat(booked, starts), np.add.reduceat(bookable, starts))
+    return {f"{start + 1}-{min(start + band, states.shape[1])}": float(factor)
+            for start, factor in zip(starts.tolist(), factors)}
+
+
+def availability_heatmap(states, template, seat_class="window"):
+    """
+    Returns the share of flights on which each seat is free, as an array of shape (rows, columns).
+    Only seats of seat_class ("window", "aisle" or "middle", or None for every seat) get a value;
+    every other position is NaN.
+    """
+    columns = [k is not None and (seat_class is None or SEAT_CLASSES[k] == seat_class)
+               for k in template.column_classes]
+    return np.where(np.array(columns), (states == FREE).mean(axis=0), np.nan)
+
+
+def adjacent_free(states, size=2):
+    """
+    Returns, for every flight, the number of places where size free seats sit side by side
+    in a row without crossing the aisle. Places may overlap: three free seats in a row hold two pairs.
+    """
+    free = states == FREE
+    places = free.shape[2] - size + 1
+    if places <= 0:
+        return np.zeros(free.shape[0], dtype=np.int64)
+    # The aisle is never free, so a block can never cross it
+    block = free[:, :, :places].copy()
+    for offset in range(1, size):
+        block &= free[:, :, offset:offset + places]
+    return block.sum(axis=(1, 2))
+
+
+def zone_aggregates(states, zones=REVENUE_ZONES):
+    """
+    Returns the booked and free seats, load factor and revenue of every revenue zone over all flights,
+    together with the revenue of the zone on every flight as an array.
+    """
+    booked_rows = (states == BOOKED).sum(axis=2)
+    free_rows = (states == FREE).sum(axis=2)
+    aggregates = {}
+    for name, (first, last, fare) in zones.items():
+        booked = booked_rows[:, first - 1:last].sum(axis=1)
+        free = int(free_rows[:, first - 1:last].sum())
+        total = int(booked.sum())
+        aggregates[name] = {
+            "booked": total,
+            "free": free,
+            "load_factor": total / (total + free) if total + free else 0.0,
+            "revenue": total * fare,
+            "revenue_by_flight": booked * fare,
+        }
+    return aggregates
+
+
+def _loop_load_factor_by_row_band(seat_maps, band=10):
+    # The same statistic as load_factor_by_row_band, reading every seat by its key
+    template = seat_maps[0].template
+    codec = get_codec(template.name)
+    booked = [0] * template.rows
+    bookable = [0] * template.rows
+    for seating in seat_maps:
+        for seat_id in template.seat_ids:
+            value = seating[seat_id]
+            if value in ("X", "S"):
+                continue
+            row = codec.parse(seat_id)[0] - 1
+            bookable[row] += 1
+            if value != "F":
+                booked[row] += 1
+    factors = {}
+    for start in range(0, template.rows, band):
+        end = min(start + band, template.rows)
+        total = sum(bookable[start:end])
+        factors[f"{start + 1}-{end}"] = sum(booked[start:end]) / total if total else 0.0
+    return factors
+
+
+def _fastest(function, rounds):
+    # Runs function rounds times and returns its result and the shortest time taken
+    seconds = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - started)
+    return result, min(seconds)
+
+
+def speed_check(flights=1000, occupancy_level=0.6, seed=723, rounds=3):
+    """
+    Times load_factor_by_row_band against a loop over every seat key of every flight
+    and prints the speedup, taking the fastest of rounds runs of each so one slow run
+    does not decide the outcome. Also checks that both give the same load factors.
+    """
+    _require_numpy()
+    template = get_template("standard")
+    rnd = random.Random(seed)
+    seat_maps = []
+    for _ in range(flights):
+        codes = bytearray(template.buffer)
+        for i, bookable in enumerate(template.bookable_mask):
+            if bookable and rnd.random() < occupancy_level:
+                codes[i] = BOOKED
+        seat_maps.append(SeatMap.restore(template, codes, {}))
+
+    expected, loop_seconds = _fastest(lambda: _loop_load_factor_by_row_band(seat_maps), rounds)
+    factors, numpy_seconds = _fastest(lambda: load_factor_by_row_band(seat_states(seat_maps)), rounds)
+
+    same = all(abs(factors[band] - expected[band]) < 1e-9 for band in expected)
+    print(f"{flights} flights: loop {loop_seconds * 1000:.1f} ms, NumPy {numpy_seconds * 1000:.1f} ms "
+          f"({loop_seconds / numpy_seconds:.0f}x), {'same results' if same else 'RESULTS DIFFER'}")
+
+
+if __name__ == "__main__":
+    speed_check(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,103 @@
+# FC723 Project – Seat Booking Application
+
+# Cache of seat availability answers for the booking server.
+
+# Clients poll the same seats over and over, and every check used to build a new answer and a new
+# JSON response. The cache keeps the answer of each (flight, seat) together with its encoded response
+# line, in least-recently-used order, so a repeated check returns the stored objects as they are.
+#
+# Entries are removed exactly when their seat changes: the cache watches the seat map of every
+# flight it holds answers for, and every booking, freed seat, modified or cancelled booking
+# drops the entries of the seats it changed, and nothing else. A flight whose cabin was evicted and
+# reloaded (see inventory.py) comes back as a new seat map the cache is not watching yet; all its
+# entries are dropped the first time the new seat map is seen, as changes to it were never reported.
+
+import json
+import threading
+from collections import OrderedDict
+
+
+class AvailabilityCache:
+    """
+    Bounded LRU cache of availability answers keyed by (flight, seat).
+    check is the function that builds an answer, called as check(seating, seat_id).
+    """
+
+    def __init__(self, check, max_entries=4096):
+        self.check = check
+        self.max_entries = max_entries
+        # (flight_id, seat_id) -> (answer, encoded response line), oldest use first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so an answer built while its seat changed is not stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, flight_id, seat_map, seat_id):
+        """
+        Returns (answer, response line) for a seat of a flight, from the cache if possible.
+        The response line is the JSON encoded {"result": answer} followed by a newline.
+        """
+        key = (flight_id, seat_id)
+        if self not in seat_map.availability:
+            self._watch(flight_id, seat_map)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            generation = self._generation
+        answer = self.check(seat_map, seat_id)
+        entry = (answer, (json.dumps({"result": answer}) + "\n").encode())
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = entry
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def _watch(self, flight_id, seat_map):
+        seat_map.availability += (self,)
+        seat_map.watch(lambda positions: self._changed(flight_id, seat_map, positions))
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._entries if key[0] == flight_id]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def _changed(self, flight_id, seat_map, positions):
+        seat_ids = seat_map.template.seat_ids
+        with self._lock:
+            self._generation += 1
+            for i in positions:
+                if self._entries.pop((flight_id, seat_ids[i]), None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        """
+        Removes every entry.
+        """
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns the number of hits, misses and invalidations, the hit rate and the number of entries.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
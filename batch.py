@@ -0,0 +1,71 @@
+# FC723 Project – Seat Booking Application
+
+# Non-interactive batch mode for the seat booking applications.
+
+# Commands are read one per line from a file or standard input and applied in order without
+# showing the menu. Each command produces one JSON line on the output, so a day's transaction log
+# can be replayed and its results processed by other tools.
+#
+# A command is either plain text, e.g.
+#     book 2B
+#     modify 2B 3C
+# or a JSON object, e.g.
+#     {"op": "book", "args": ["2B"]}
+# Blank lines and lines starting with "#" are skipped.
+
+import json
+import sys
+
+
+def parse_command(line):
+    """
+    Splits a command line into the operation name and its arguments.
+    Returns None for blank lines and comments.
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if line.startswith("{"):
+        command = json.loads(line)
+        return command["op"], [str(arg) for arg in command.get("args", [])]
+    op, *args = line.split()
+    return op, args
+
+
+def run_batch(seating, commands, lines, out=None, normalize=None):
+    """
+    Applies every command in lines to the seating chart and writes one JSON result per command.
+    commands maps an operation name to a function called as function(seating, *args) that
+    returns a message. If normalize is given it is applied to every argument first
+    (e.g. str.upper, as the menus do with seat IDs).
+    Returns the number of commands that failed.
+    """
+    out = out or sys.stdout
+    failures = 0
+    for number, line in enumerate(lines, start=1):
+        try:
+            command = parse_command(line)
+            if command is None:
+                continue
+            op, args = command
+            if normalize is not None:
+                args = [normalize(arg) for arg in args]
+            if op not in commands:
+                raise ValueError(f"Unknown command: {op}")
+            result = {"line": number, "op": op, "args": args, "result": commands[op](seating, *args)}
+        except (ValueError, KeyError, TypeError) as error:
+            failures += 1
+            result = {"line": number, "error": str(error)}
+        out.write(json.dumps(result) + "\n")
+    out.flush()
+    return failures
+
+
+def run_batch_file(seating, commands, path="-", normalize=None):
+    """
+    Runs the commands in a file, or standard input when path is "-", writing results to standard output.
+    """
+    if path == "-":
+        return run_batch(seating, commands, sys.stdin, normalize=normalize)
+    with open(path) as lines:
+        return run_batch(seating, commands, lines, normalize=normalize)
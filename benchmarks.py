@@ -0,0 +1,275 @@
+# FC723 Project – Seat Booking Application
+
+# Benchmark suite for the core seat booking operations.
+
+# Every operation is timed call by call at several cabin sizes and occupancy levels. The suite
+# reports operations per second, median (p50) and 99th percentile (p99) latency and the peak memory
+# allocated while the operation runs. Results can be saved as a baseline file and later runs
+# compared against it, flagging any operation whose median latency became noticeably slower.
+#
+#     python benchmarks.py                 run and print the results
+#     python benchmarks.py --save          run and store the results as the baseline
+#     python benchmarks.py --compare       run and compare against the baseline (exit code 1 on regression)
+#     python benchmarks.py --quick ...     fewer iterations, for a fast check
+
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from booking_refs import ReferenceRegistry
+from layouts import register_template
+from task_loader import load_task
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Cabin sizes (number of rows) and occupancy levels (fraction of bookable seats already booked)
+CABIN_ROWS = (40, 80, 240)
+# The SQLite version only accepts seat IDs of the standard 80-row aircraft
+SQLITE_MAX_ROWS = 80
+OCCUPANCY_LEVELS = (0.0, 0.5, 0.9)
+
+# Each measurement is repeated and the fastest round is reported, to reduce noise
+ROUNDS = 3
+
+# An operation counts as a regression when its median latency grows by more than this fraction
+REGRESSION_THRESHOLD = 0.25
+
+# Fixed seed so that every run books the same seats in the same order
+SEED = 723
+
+
+def bench_template(rows):
+    """
+    Returns a layout with the standard columns and the given number of rows,
+    with storage in columns D-F of the last two rows as on the standard aircraft.
+    """
+    return register_template(f"bench-{rows}", rows, ('A', 'B', 'C', 'aisle', 'D', 'E', 'F'),
+                             storage_rows=(rows - 1, rows), storage_columns=('D', 'E', 'F'))
+
+
+def measure(step, iterations, setup=None):
+    """
+    Times step() iterations times, running setup() untimed before each call if given.
+    Returns ops/sec, p50 and p99 latency in microseconds and peak memory in kilobytes,
+    taken from the fastest of ROUNDS rounds.
+    """
+    best = None
+    for _ in range(ROUNDS):
+        round_timings = []
+        for _ in range(iterations):
+            if setup is not None:
+                setup()
+            started = time.perf_counter_ns()
+            step()
+            round_timings.append(time.perf_counter_ns() - started)
+        if best is None or sum(round_timings) < sum(best):
+            best = round_timings
+    timings = best
+    # Peak memory is measured in a separate, shorter pass because tracing slows every call down
+    tracemalloc.start()
+    for _ in range(max(1, iterations // 10)):
+        if setup is not None:
+            setup()
+        step()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    timings.sort()
+    total = sum(timings) or 1
+    return {
+        "ops_per_sec": round(iterations / (total / 1e9), 1),
+        "p50_us": round(timings[len(timings) // 2] / 1000, 2),
+        "p99_us": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] / 1000, 2),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def fill(seating, book, occupancy, rnd):
+    """
+    Books the given fraction of the free seats and returns (booked seats, free seats).
+    """
+    free = [seat for seat, value in seating.items() if value == 'F']
+    rnd.shuffle(free)
+    count = int(len(free) * occupancy)
+    for seat in free[:count]:
+        book(seat)
+    return free[:count], free[count:]
+
+
+def bench_memory_ops(task, template, occupancy, iterations):
+    """
+    Benchmarks the in-memory operations of task 1B on one cabin.
+    """
+    rnd = random.Random(SEED)
+    results = {}
+    results["initialize_seating"] = measure(lambda: task.SeatMap(template), iterations)
+
+    seating = task.SeatMap(template)
+    booked, free = fill(seating, lambda seat: task.book_seat(seating, seat), occupancy, rnd)
+    # Keep one booked and one free seat aside so booked/free counts stay the same between calls
+    if not booked:
+        task.book_seat(seating, free[-1])
+        booked = [free.pop()]
+    seat_to_book, seat_to_free = free[0], booked[0]
+
+    results["book_seat"] = measure(lambda: task.book_seat(seating, seat_to_book), iterations,
+                                   setup=lambda: task.free_seat(seating, seat_to_book))
+    task.free_seat(seating, seat_to_book)
+    results["free_seat"] = measure(lambda: task.free_seat(seating, seat_to_free), iterations,
+                                   setup=lambda: task.book_seat(seating, seat_to_free))
+    task.book_seat(seating, seat_to_free)
+
+    moves = [seat_to_free, seat_to_book]
+
+    def modify():
+        # Move the booking back and forth between the same two seats
+        task.modify_booking(seating, moves[0], moves[1])
+        moves.reverse()
+
+    results["modify_booking"] = measure(modify, iterations)
+
+    def generate():
+        task.reference_registry.release(task.generate_booking_reference(seating))
+
+    results["generate_booking_reference"] = measure(generate, iterations)
+
+    out = io.StringIO()
+
+    def show():
+        out.seek(0)
+        with contextlib.redirect_stdout(out):
+            task.show_booking_status(seating)
+
+    results["show_booking_status (unchanged)"] = measure(show, iterations)
+    results["show_booking_status (one change)"] = measure(show, iterations, setup=modify)
+    return results
+
+
+def bench_sqlite_ops(task, template, occupancy, iterations):
+    """
+    Benchmarks the database operations of the SQLite version on one cabin.
+    """
+    rnd = random.Random(SEED)
+    results = {}
+    seating = task.SeatMap(template)
+    counter = iter(range(10 ** 9))
+
+    def book(seat):
+        n = next(counter)
+        return task.reserve_seat(seating, f"First{n}", f"Last{n}", f"P{n:08d}", seat)
+
+    booked, free = fill(seating, book, occupancy, rnd)
+    seat = free[0]
+    task.reserve_seat(seating, "Lookup", "Passenger", "LOOKUP001", free[1])
+    refs = []
+
+    def reserve():
+        refs.append(book(seat).rsplit(" ", 1)[-1])
+
+    def cancel():
+        task.cancel_reference(seating, refs.pop())
+
+    results["reserve_seat (sqlite)"] = measure(reserve, iterations, setup=lambda: refs and cancel())
+    while refs:
+        cancel()
+    results["cancel_booking (sqlite)"] = measure(cancel, iterations, setup=reserve)
+    results["lookup_booking (sqlite)"] = measure(
+        lambda: task.lookup_booking(seating, "Lookup", "Passenger"), iterations)
+    results["load_seating_from_db (sqlite)"] = measure(
+        lambda: task.load_seating_from_db(task.SeatMap(template)), max(1, iterations // 10))
+
+    out = io.StringIO()
+
+    def display():
+        out.seek(0)
+        with contextlib.redirect_stdout(out):
+            task.display_seating(seating)
+
+    results["display_seating"] = measure(display, iterations)
+    return results
+
+
+def run(iterations=2000, sqlite_iterations=200):
+    """
+    Runs every benchmark and returns the results keyed by "operation | rows | occupancy".
+    """
+    results = {}
+    task = load_task("task 1B.py")
+    with tempfile.TemporaryDirectory() as folder:
+        # The SQLite version opens bookings.db in the current folder when it is loaded
+        previous = os.getcwd()
+        os.chdir(folder)
+        try:
+            db_task = load_task("task 2B final.py")
+            for rows in CABIN_ROWS:
+                template = bench_template(rows)
+                for occupancy in OCCUPANCY_LEVELS:
+                    suffix = f" | {rows} rows | {int(occupancy * 100)}%"
+                    for name, result in bench_memory_ops(task, template, occupancy, iterations).items():
+                        results[name + suffix] = result
+                    if rows > SQLITE_MAX_ROWS:
+                        continue
+                    # Start every SQLite run from an empty bookings table
+                    db_task.store.conn.execute("DELETE FROM bookings")
+                    sequence = db_task.reference_registry.sequence
+                    db_task.reference_registry = ReferenceRegistry(sequence=sequence)
+                    for name, result in bench_sqlite_ops(db_task, template, occupancy, sqlite_iterations).items():
+                        results[name + suffix] = result
+            db_task.store.close()
+        finally:
+            os.chdir(previous)
+    return results
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Returns a list of messages for every operation whose median latency is
+    more than threshold slower than its baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["p50_us"] > base["p50_us"] * (1 + threshold):
+            regressions.append(f"{name}: p50 {result['p50_us']:.2f} us, baseline {base['p50_us']:.2f} us")
+    return regressions
+
+
+def print_results(results):
+    print(f"{'operation':60} {'ops/sec':>12} {'p50 us':>10} {'p99 us':>10} {'peak KB':>10}")
+    for name, result in results.items():
+        print(f"{name:60} {result['ops_per_sec']:>12.0f} {result['p50_us']:>10.2f} "
+              f"{result['p99_us']:>10.2f} {result['peak_kb']:>10.1f}")
+
+
+def main():
+    args = sys.argv[1:]
+    if "--quick" in args:
+        results = run(iterations=200, sqlite_iterations=20)
+    else:
+        results = run()
+    print_results(results)
+
+    if "--save" in args:
+        with open(BASELINE_FILE, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=2)
+        print(f"\nBaseline saved to {BASELINE_FILE}")
+    if "--compare" in args:
+        with open(BASELINE_FILE) as baseline_file:
+            regressions = compare(results, json.load(baseline_file))
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for message in regressions:
+                print("  " + message)
+            sys.exit(1)
+        print("\nNo regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
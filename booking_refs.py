@@ -0,0 +1,282 @@
+# FC723 Project – Seat Booking Application
+
+# Booking reference registry shared by the seat booking applications.
+
+# The registry keeps every booking reference that is currently in use in a set,
+# so checking a new reference for uniqueness no longer means scanning the whole seating chart.
+
+# References can also come from a ReferenceSequence: a counter passed through a secret keyed
+# permutation of all 36^8 possible references. Different counter values always give different
+# references, so one sequence (or the shards of one key) never draws a reference twice, while the
+# key keeps the next reference impossible to guess from the previous ones. A new sequence starts
+# at a random counter value and usually gets a new key, so it can still draw a reference that an
+# earlier run stored in the database; the registry's claim check is kept as the fallback for that.
+#
+# The permutation works on the four two-character chunks of a reference (numbers below 36^2 = 1296)
+# and its round function is made of small lookup tables over single chunks: three tables of 1296
+# values per round, drawn once from SHAKE-256 keyed with the secret key (about half a megabyte for
+# all rounds, built in a few milliseconds). A reference then costs a few additions and lookups
+# instead of four hash computations, and take() draws a whole batch in one call.
+
+import hashlib
+import os
+import random
+import re
+import secrets
+import string
+import threading
+
+from metrics import increment
+from seat_map import BOOKED_MARKER, STATUS_CODES
+
+REFERENCE_ALPHABET = string.ascii_uppercase + string.digits
+REFERENCE_LENGTH = 8
+# A well-formed booking reference, e.g. from an imported manifest
+REFERENCE_PATTERN = re.compile(f"[{REFERENCE_ALPHABET}]{{{REFERENCE_LENGTH}}}")
+
+# Seating values that are seat states rather than booking references,
+# including the marker of a seat booked without a reference
+SEAT_SENTINELS = frozenset(STATUS_CODES) | {BOOKED_MARKER}
+
+# A reference is treated as two halves of four characters each, i.e. two numbers below 36^4,
+# and every half as two chunks of two characters, i.e. two numbers below 36^2
+CHUNK_SPACE = len(REFERENCE_ALPHABET) ** 2
+HALF_SPACE = CHUNK_SPACE * CHUNK_SPACE
+REFERENCE_SPACE = HALF_SPACE * HALF_SPACE
+FEISTEL_ROUNDS = 4
+
+# Two-character chunks of the alphabet, so a reference is encoded with four lookups
+_PAIRS = [a + b for a in REFERENCE_ALPHABET for b in REFERENCE_ALPHABET]
+
+# Round tables built so far, keyed by secret key
+_round_tables = {}
+
+
+def _tables_for(key):
+    # Three tables of one chunk value per possible chunk for every round, from 32-bit SHAKE-256 output
+    tables = _round_tables.get(key)
+    if tables is None:
+        tables = []
+        for r in range(FEISTEL_ROUNDS):
+            data = memoryview(hashlib.shake_256(b"fc723-round-%d" % r + key).digest(12 * CHUNK_SPACE))
+            values = [value % CHUNK_SPACE for value in data.cast("I")]
+            tables.append(tuple(values[t * CHUNK_SPACE:(t + 1) * CHUNK_SPACE] for t in range(3)))
+        tables = _round_tables[key] = tuple(tables)
+    return tables
+
+
+def _round(tables, left, right):
+    # One Feistel round on chunk pairs: the right half (c, d), mixed through the round's tables,
+    # is added chunk by chunk to the left half (a, b)
+    a, b = left
+    c, d = right
+    outer, inner, last = tables
+    u = outer[(c + inner[d]) % CHUNK_SPACE]
+    return (a + u) % CHUNK_SPACE, (b + last[(d + u) % CHUNK_SPACE]) % CHUNK_SPACE
+
+
+def reference_key():
+    """
+    Returns the secret key for reference sequences: the hex value of the FC723_REFERENCE_KEY
+    environment variable if it is set, otherwise a new random key for this process.
+    """
+    key = os.environ.get("FC723_REFERENCE_KEY")
+    return bytes.fromhex(key) if key else secrets.token_bytes(16)
+
+
+class ReferenceSequence:
+    """
+    Generates booking references from a counter in constant time, without ever repeating one.
+    Each counter value is put through a Feistel network over the two halves of the reference,
+    with small tables drawn from SHAKE-256 keyed by a secret key as the round function. A Feistel
+    network is a permutation whatever its round function, so different counter values give
+    different references. The tables are not a vetted cipher, but without the key the next
+    reference cannot be told from the previous ones at a glance.
+
+    Sequences sharing a key can be split into shards: shard s of n only uses the counter values
+    s, s + n, s + 2n, ..., so shards never produce the same reference. The counter starts at a
+    random position; two sequences with the same key started separately can overlap, so the
+    references are only guaranteed new within one sequence and its sibling shards.
+    """
+
+    def __init__(self, key=None, shard=0, shards=1):
+        self.key = key or reference_key()
+        self.shards = shards
+        # Built on first use, so a process that never books pays nothing for them
+        self._tables = None
+        # Next counter value, taken under the lock so threads sharing a sequence never get the same one
+        self._position = secrets.randbelow(REFERENCE_SPACE // shards) * shards + shard
+        self._lock = threading.Lock()
+
+    def permute(self, number):
+        """
+        Maps a number below 36^8 to another number below 36^8, one to one.
+        """
+        tables = self._tables or self._build()
+        left, right = divmod(number % REFERENCE_SPACE, HALF_SPACE)
+        left, right = divmod(left, CHUNK_SPACE), divmod(right, CHUNK_SPACE)
+        for round_tables in tables:
+            left, right = right, _round(round_tables, left, right)
+        # An even number of rounds leaves the halves in their original order
+        (a, b), (c, d) = left, right
+        return ((a * CHUNK_SPACE + b) * CHUNK_SPACE + c) * CHUNK_SPACE + d
+
+    def _reserve(self, n):
+        # Returns the first of n counter values of this shard, which no other caller will get
+        with self._lock:
+            first = self._position
+            self._position += n * self.shards
+        return first
+
+    def _build(self):
+        self._tables = _tables_for(self.key)
+        return self._tables
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        value = self.permute(self._reserve(1))
+        value, d = divmod(value, CHUNK_SPACE)
+        value, c = divmod(value, CHUNK_SPACE)
+        a, b = divmod(value, CHUNK_SPACE)
+        return _PAIRS[a] + _PAIRS[b] + _PAIRS[c] + _PAIRS[d]
+
+    def take(self, n):
+        """
+        Returns the next n references as a list.
+        Same references as n calls of next(), with the four rounds of _round unrolled and no call
+        per reference: rounds change the chunks of the two halves in turn instead of swapping them.
+        """
+        (o0, i0, l0), (o1, i1, l1), (o2, i2, l2), (o3, i3, l3) = self._tables or self._build()
+        pairs = _PAIRS
+        size = CHUNK_SPACE
+        first = self._reserve(n)
+        refs = []
+        append = refs.append
+        for number in range(first, first + n * self.shards, self.shards):
+            number, d = divmod(number % REFERENCE_SPACE, size)
+            number, c = divmod(number, size)
+            a, b = divmod(number, size)
+            u = o0[(c + i0[d]) % size]
+            a, b = (a + u) % size, (b + l0[(d + u) % size]) % size
+            u = o1[(a + i1[b]) % size]
+            c, d = (c + u) % size, (d + l1[(b + u) % size]) % size
+            u = o2[(c + i2[d]) % size]
+            a, b = (a + u) % size, (b + l2[(d + u) % size]) % size
+            u = o3[(a + i3[b]) % size]
+            c, d = (c + u) % size, (d + l3[(b + u) % size]) % size
+            append(pairs[a] + pairs[b] + pairs[c] + pairs[d])
+        return refs
+
+
+class ReferenceRegistry:
+    """
+    Keeps track of every booking reference currently in use.
+    References are claimed when a seat is booked and released when it is freed or cancelled,
+    so uniqueness checks are a single set lookup instead of a scan of the seating chart.
+    """
+
+    def __init__(self, refs=(), sequence=None):
+        self._refs = set(refs)
+        # Optional ReferenceSequence used instead of random references
+        self.sequence = sequence
+        # Number of seats holding a reference, for references shared by a group booking
+        self._holders = {}
+
+    def __contains__(self, ref):
+        return ref in self._refs
+
+    def __len__(self):
+        return len(self._refs)
+
+    def __iter__(self):
+        return iter(self._refs)
+
+    def claim(self, ref):
+        """
+        Marks a reference as in use.
+        Returns False if the reference was already taken.
+        """
+        if ref in self._refs:
+            return False
+        self._refs.add(ref)
+        return True
+
+    def share(self, ref, seats):
+        """
+        Records that a claimed reference is held by several seats (a group booking),
+        so it stays in use until every one of those seats has been released.
+        """
+        if seats > 1:
+            self._holders[ref] = seats
+
+    def release(self, ref):
+        """
+        Marks a reference as no longer in use by one seat.
+        Seat states ("F", "X", "S", "H", "A") and unknown references are ignored.
+        """
+        holders = self._holders.pop(ref, 1) - 1
+        if holders > 1:
+            self._holders[ref] = holders
+        elif holders == 0:
+            self._refs.discard(ref)
+
+    def generate(self):
+        """
+        Generates a new unique 8-character alphanumeric booking reference and claims it.
+        A sequence never repeats its own references, but it can draw one that an earlier run left
+        in use (loaded with load_from_db or load_from_seating); the claim catches that rare case
+        and the next reference is drawn instead.
+        """
+        while True:
+            if self.sequence is not None:
+                ref = next(self.sequence)
+            else:
+                ref = ''.join(random.choices(REFERENCE_ALPHABET, k=REFERENCE_LENGTH))
+            if self.claim(ref):
+                return ref
+            # The reference was already taken and another one is tried
+            increment("reference_retries")
+
+    def generate_many(self, n):
+        """
+        Generates and claims n new unique booking references, for bulk imports.
+        With a sequence they are drawn in one take() call and claimed with one set check;
+        references already in use are replaced the same way as in generate().
+        """
+        if self.sequence is None:
+            return [self.generate() for _ in range(n)]
+        refs = self.sequence.take(n)
+        if self._refs.isdisjoint(refs):
+            self._refs.update(refs)
+            return refs
+        # Only possible with a reference left in use by an earlier run
+        fresh = []
+        for ref in refs:
+            if not self.claim(ref):
+                increment("reference_retries")
+                ref = self.generate()
+            fresh.append(ref)
+        return fresh
+
+    def load_from_seating(self, seating):
+        """
+        Registers every booking reference stored in a seating chart.
+        """
+        for value in seating.values():
+            if value in SEAT_SENTINELS:
+                continue
+            if value in self._refs:
+                # A reference shared by a group booking
+                self._holders[value] = self._holders.get(value, 1) + 1
+            else:
+                self._refs.add(value)
+
+    def load_from_db(self, cursor):
+        """
+        Registers every booking reference stored in the SQLite bookings table,
+        including references for seats that are not loaded into memory.
+        """
+        for (ref,) in cursor.execute("SELECT booking_ref FROM bookings"):
+            self._refs.add(ref)
@@ -0,0 +1,217 @@
+# FC723 Project – Seat Booking Application
+
+# asyncio booking server for the seat booking applications.
+
+# The server accepts many clients at once over TCP. Each request is one JSON line naming a flight,
+# an operation and its arguments, e.g.
+#     {"flight": "AA101", "op": "book", "args": ["2B"]}
+# and is answered with one JSON line, e.g.
+#     {"result": "Seat 2B has been successfully booked with reference K4M6SOBQ."}
+# Operations are the booking functions of the task scripts (check_availability, book_seat,
+# free_seat and modify_booking by default). Changes to a flight are serialized with a lock per
+# flight, so two clients can never book the same seat while other flights are served in parallel.
+# Answers to "check" requests are kept in an AvailabilityCache (see availability_cache.py) until
+# their seat changes, so clients polling the same seats get the stored response line back.
+#
+# Run the server:            python booking_server.py [port]
+# Run the loopback check:    python booking_server.py --loopback [clients]
+# Run the cache check:       python booking_server.py --cache-check
+# (each client uses two sockets, so thousands of clients may need a higher "ulimit -n")
+
+import asyncio
+import json
+import os
+import sys
+
+from availability_cache import AvailabilityCache
+from inventory import FlightInventory
+import metrics
+from task_loader import load_task
+
+# Operations that only read seat state and do not need the flight lock
+READ_ONLY_OPERATIONS = frozenset({"check", "occupancy"})
+
+
+class BookingServer:
+    """
+    Serves booking commands for the flights of a FlightInventory.
+    commands maps an operation name to a function called as function(seating, *args),
+    as used by batch mode. Unknown flights are created with the standard layout.
+    """
+
+    def __init__(self, commands, inventory, layout="standard"):
+        self.commands = commands
+        self.inventory = inventory
+        self.layout = layout
+        self._locks = {}
+        self.availability = AvailabilityCache(commands["check"]) if "check" in commands else None
+
+    def _lock(self, flight_id):
+        lock = self._locks.get(flight_id)
+        if lock is None:
+            lock = self._locks[flight_id] = asyncio.Lock()
+        return lock
+
+    def _cached_check(self, request):
+        # Returns (answer, response line) for a check request, or None if it cannot be cached
+        if not isinstance(request, dict):
+            return None
+        args = request.get("args", [])
+        if request.get("op") != "check" or self.availability is None or len(args) != 1:
+            return None
+        flight_id = str(request["flight"])
+        if flight_id not in self.inventory:
+            self.inventory.add_flight(flight_id, self.layout)
+        return self.availability.lookup(flight_id, self.inventory.cabin(flight_id), str(args[0]).upper())
+
+    async def handle_request(self, request):
+        """
+        Applies one request and returns the response dictionary.
+        """
+        cached = self._cached_check(request)
+        if cached is not None:
+            return {"result": cached[0]}
+        flight_id = str(request["flight"])
+        op = request["op"]
+        args = [str(arg).upper() for arg in request.get("args", [])]
+        if op not in self.commands:
+            raise ValueError(f"Unknown command: {op}")
+        if flight_id not in self.inventory:
+            self.inventory.add_flight(flight_id, self.layout)
+        if op in READ_ONLY_OPERATIONS:
+            return {"result": self.commands[op](self.inventory.cabin(flight_id), *args)}
+        async with self._lock(flight_id):
+            return {"result": self.commands[op](self.inventory.cabin(flight_id), *args)}
+
+    async def handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    cached = self._cached_check(request)
+                    if cached is not None:
+                        writer.write(cached[1])
+                        await writer.drain()
+                        continue
+                    response = await self.handle_request(request)
+                except (ValueError, KeyError, TypeError) as error:
+                    response = {"error": str(error)}
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host="127.0.0.1", port=8723):
+        """
+        Starts listening and returns the asyncio server.
+        """
+        return await asyncio.start_server(self.handle_client, host, port, backlog=4096)
+
+
+def default_commands():
+    """
+    Returns the booking operations of task 1B: check, book, free and modify.
+    """
+    return load_task("task 1B.py").BATCH_COMMANDS
+
+
+async def serve(port=8723, db_path="inventory.db"):
+    inventory = FlightInventory(db_path)
+    server = await BookingServer(default_commands(), inventory).start(port=port)
+    print(f"Apache Airlines booking server listening on port {port}")
+    if metrics.ENABLED and os.environ.get("FC723_METRICS_PORT"):
+        metrics_port = int(os.environ["FC723_METRICS_PORT"])
+        metrics.serve_metrics(metrics_port)
+        print(f"Metrics available at http://127.0.0.1:{metrics_port}/metrics")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        inventory.close()
+
+
+async def loopback_check(clients=1000, flights=5, seats=("1A", "1B", "1C", "2A", "2B")):
+    """
+    Local loopback test harness.
+    Starts a server on a free port and lets many concurrent clients try to book the same seats
+    on a few flights, checking each seat after trying to book it. Every seat must be booked exactly
+    once and every check must find the seat booked. Returns True if the check passed.
+    """
+    inventory = FlightInventory(":memory:")
+    booking_server = BookingServer(default_commands(), inventory)
+    server = await booking_server.start(port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    stale = []
+
+    async def client(number):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        booked = []
+        for seat in seats:
+            flight = f"LB{number % flights}"
+            writer.write(json.dumps({"flight": flight, "op": "book", "args": [seat]}).encode() + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            if "successfully booked" in response.get("result", ""):
+                booked.append((flight, seat))
+            writer.write(json.dumps({"flight": flight, "op": "check", "args": [seat]}).encode() + b"\n")
+            await writer.drain()
+            response = json.loads(await reader.readline())
+            if "already booked" not in response.get("result", ""):
+                stale.append((flight, seat))
+        writer.close()
+        await writer.wait_closed()
+        return booked
+
+    async with server:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        results = await asyncio.gather(*(client(n) for n in range(clients)))
+        elapsed = loop.time() - started
+
+    bookings = [booking for booked in results for booking in booked]
+    passed = len(bookings) == len(set(bookings)) == flights * len(seats) and not stale
+    stats = booking_server.availability.stats()
+    print(f"{clients} clients, {clients * len(seats) * 2} requests in {elapsed:.2f}s: "
+          f"{len(bookings)} seats booked, {'no double bookings' if passed else 'CHECK FAILED'}, "
+          f"availability cache hit rate {stats['hit_rate']:.1%}")
+    return passed
+
+
+async def cache_eviction_check():
+    """
+    Checks that availability answers stay correct when a flight's cabin is evicted and reloaded.
+    With room for one cabin only, checking a second flight evicts the first; a booking on the
+    reloaded first flight must then show up in the next check. Returns True if the check passed.
+    """
+    booking_server = BookingServer(default_commands(), FlightInventory(":memory:", max_cabins=1))
+    steps = [
+        ({"flight": "F1", "op": "check", "args": ["1A"]}, "available"),
+        ({"flight": "F2", "op": "check", "args": ["1A"]}, "available"),
+        ({"flight": "F1", "op": "book", "args": ["1A"]}, "successfully booked"),
+        ({"flight": "F1", "op": "check", "args": ["1A"]}, "already booked"),
+        ({"flight": "F2", "op": "check", "args": ["1A"]}, "available"),
+    ]
+    passed = True
+    for request, expected in steps:
+        result = (await booking_server.handle_request(request))["result"]
+        if expected not in result:
+            print(f"{request['flight']} {request['op']} {request['args'][0]}: {result} (expected {expected!r})")
+            passed = False
+    booking_server.inventory.close()
+    print("Availability cache survives cabin eviction" if passed else "CACHE CHECK FAILED")
+    return passed
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--loopback":
+        clients = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+        sys.exit(0 if asyncio.run(loopback_check(clients)) else 1)
+    if len(sys.argv) > 1 and sys.argv[1] == "--cache-check":
+        sys.exit(0 if asyncio.run(cache_eviction_check()) else 1)
+    asyncio.run(serve(int(sys.argv[1]) if len(sys.argv) > 1 else 8723))
@@ -0,0 +1,381 @@
+# FC723 Project – Seat Booking Application
+
+# SQLite persistence layer for passenger bookings.
+
+# The store opens the bookings database in write-ahead log (WAL) mode and can group writes into
+# larger transactions, so a bulk import no longer pays for one commit (and one fsync) per booking.
+# Every booking and cancellation is also recorded in a numbered change log by triggers, inside the
+# same transaction, so a seat map snapshot (see snapshot.py) can be brought up to date by replaying
+# only the changes made after it was taken.
+
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import instrument
+
+# Durability modes
+#
+# "immediate": every booking and cancellation is committed on its own with synchronous=FULL.
+#     Once add_booking/remove_booking returns, the change survives a process crash and a power loss.
+#
+# "batched": writes are collected into one transaction that is committed when batch_size writes
+#     are pending, when flush_interval seconds have passed since the first pending write (checked
+#     on the next write), or when flush()/close() is called. Uses synchronous=NORMAL, so committed
+#     batches survive a process crash but the most recent commits can be lost on a power loss.
+#     Pending, uncommitted writes are lost if the process dies before the batch is committed.
+IMMEDIATE = "immediate"
+BATCHED = "batched"
+
+SYNCHRONOUS = {IMMEDIATE: "PRAGMA synchronous=FULL", BATCHED: "PRAGMA synchronous=NORMAL"}
+
+# Rows fetched from SQLite at a time when streaming query results
+FETCH_SIZE = 500
+
+# Prepared statements kept per connection. Every query below is a fixed string with ? parameters,
+# so each one is compiled once per connection and reused from this cache afterwards.
+STATEMENT_CACHE_SIZE = 64
+
+# The booking reference is the primary key; full_name holds the upper-cased "FIRST LAST"
+# so that passengers can be found by name through an index
+CREATE_BOOKINGS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS bookings (
+        booking_ref TEXT PRIMARY KEY,
+        first_name TEXT,
+        last_name TEXT,
+        passport TEXT,
+        seat TEXT,
+        full_name TEXT
+    )
+'''
+# Change log: one row per booking or cancellation, numbered in the order they were made.
+# AUTOINCREMENT keeps numbers from being reused after old entries are trimmed.
+CREATE_LOG_TABLE = '''
+    CREATE TABLE IF NOT EXISTS booking_log (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        action TEXT,
+        booking_ref TEXT,
+        seat TEXT
+    )
+'''
+# Triggers that log every booking and cancellation, whichever method made it
+CREATE_LOG_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS bookings_log_insert AFTER INSERT ON bookings BEGIN
+           INSERT INTO booking_log (action, booking_ref, seat) VALUES ('book', NEW.booking_ref, NEW.seat);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS bookings_log_delete AFTER DELETE ON bookings BEGIN
+           INSERT INTO booking_log (action, booking_ref, seat) VALUES ('cancel', OLD.booking_ref, OLD.seat);
+       END''',
+)
+CREATE_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS bookings_passport ON bookings (passport)",
+    "CREATE INDEX IF NOT EXISTS bookings_full_name ON bookings (full_name)",
+)
+
+BOOKING_COLUMNS = "booking_ref, first_name, last_name, passport, seat"
+INSERT_BOOKING = f"INSERT INTO bookings ({BOOKING_COLUMNS}, full_name) VALUES (?, ?, ?, ?, ?, ?)"
+SELECT_SEAT = "SELECT seat FROM bookings WHERE booking_ref = ?"
+DELETE_BOOKING = "DELETE FROM bookings WHERE booking_ref = ?"
+SELECT_BY_REF = f"SELECT {BOOKING_COLUMNS} FROM bookings WHERE booking_ref = ?"
+SELECT_BY_PASSPORT = f"SELECT {BOOKING_COLUMNS} FROM bookings WHERE passport = ? LIMIT 1"
+SELECT_BY_NAME = f"SELECT {BOOKING_COLUMNS} FROM bookings WHERE full_name = ? LIMIT 1"
+SELECT_BOOKED_SEATS = "SELECT booking_ref, seat FROM bookings"
+SELECT_ALL_BOOKINGS = f"SELECT {BOOKING_COLUMNS} FROM bookings ORDER BY booking_ref"
+SELECT_LAST_CHANGE = "SELECT seq FROM sqlite_sequence WHERE name = 'booking_log'"
+SELECT_CHANGES = "SELECT seq, action, booking_ref, seat FROM booking_log WHERE seq > ? ORDER BY seq"
+DELETE_CHANGES = "DELETE FROM booking_log WHERE seq <= ?"
+
+
+# Passport numbers are 6 to 15 letters or digits
+PASSPORT_PATTERN = re.compile(r"[A-Za-z0-9]{6,15}")
+
+
+def normalize_name(first, last):
+    """
+    Returns the upper-cased "FIRST LAST" form used for name lookups.
+    """
+    return f"{first} {last}".upper()
+
+
+class BookingStore:
+    """
+    Stores passenger bookings in SQLite.
+    See IMMEDIATE and BATCHED above for the durability guarantees of each mode.
+
+    No connection is opened until the store is first used. Writes go through a single writer
+    connection guarded by a lock (SQLite allows one writer at a time anyway). Reads borrow a
+    connection from a pool of at most max_readers connections, so lookups from several threads
+    run in parallel; a connection is only used by one thread at a time. While batched writes are
+    pending, reads use the writer connection so they see those writes.
+    """
+
+    def __init__(self, path="bookings.db", mode=IMMEDIATE, batch_size=500, flush_interval=1.0,
+                 max_readers=4):
+        if mode not in (IMMEDIATE, BATCHED):
+            raise ValueError(f"Unknown durability mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # An in-memory database exists only inside its one connection, so it cannot be pooled
+        self.max_readers = 0 if path == ":memory:" else max_readers
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self._idle_readers = []
+        self._open_readers = 0
+        self._pool = threading.Condition()
+        self._pending = 0
+        self._batch_started = None
+
+    def _connect(self):
+        # Connections may be handed from one thread to another, but each is used by one thread at a time.
+        # Transactions are managed explicitly with BEGIN/COMMIT.
+        return sqlite3.connect(self.path, isolation_level=None, check_same_thread=False,
+                               cached_statements=STATEMENT_CACHE_SIZE)
+
+    @property
+    def conn(self):
+        """
+        The writer connection, opened (creating the database and its tables) on first use.
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+                self._writer.execute("PRAGMA journal_mode=WAL")
+                self._writer.execute(SYNCHRONOUS[self.mode])
+                self._writer.execute(CREATE_BOOKINGS_TABLE)
+                self._writer.execute(CREATE_LOG_TABLE)
+                self._add_full_name_column()
+                for statement in CREATE_LOG_TRIGGERS + CREATE_INDEXES:
+                    self._writer.execute(statement)
+            return self._writer
+
+    @contextmanager
+    def _reader(self):
+        """
+        Lends a connection for reading, waiting for one to be returned if max_readers are in use.
+        """
+        if self._pending or not self.max_readers:
+            with self._write_lock:
+                yield self.conn
+            return
+        # The writer connection creates the database and its tables before any reader opens it
+        self.conn
+        with self._pool:
+            while not self._idle_readers and self._open_readers >= self.max_readers:
+                self._pool.wait()
+            conn = self._idle_readers.pop() if self._idle_readers else None
+            if conn is None:
+                self._open_readers += 1
+        if conn is None:
+            try:
+                conn = self._connect()
+            except sqlite3.Error:
+                with self._pool:
+                    self._open_readers -= 1
+                    self._pool.notify()
+                raise
+        try:
+            yield conn
+        finally:
+            with self._pool:
+                self._idle_readers.append(conn)
+                self._pool.notify()
+
+    def set_mode(self, mode):
+        """
+        Switches the durability mode, committing any pending writes first.
+        """
+        if mode not in (IMMEDIATE, BATCHED):
+            raise ValueError(f"Unknown durability mode: {mode}")
+        with self._write_lock:
+            self.flush()
+            self.mode = mode
+            if self._writer is not None:
+                self._writer.execute(SYNCHRONOUS[mode])
+
+    @instrument("add_booking", "db")
+    def add_booking(self, booking_ref, first, last, passport, seat):
+        """
+        Stores a single booking.
+        """
+        with self._write_lock:
+            with self._writing():
+                self.conn.execute(INSERT_BOOKING, (booking_ref, first, last, passport, seat,
+                                                   normalize_name(first, last)))
+            self._written(1)
+
+    @instrument("add_bookings", "db")
+    def add_bookings(self, bookings):
+        """
+        Stores many bookings with a single executemany call inside one transaction.
+        Each booking is a (booking_ref, first_name, last_name, passport, seat) tuple.
+        The bookings are committed together, whatever the durability mode.
+        """
+        with self._write_lock:
+            with self._writing():
+                self.conn.executemany(INSERT_BOOKING, (
+                    (ref, first, last, passport, seat, normalize_name(first, last))
+                    for ref, first, last, passport, seat in bookings))
+            self.flush()
+
+    @instrument("remove_booking", "db")
+    def remove_booking(self, booking_ref):
+        """
+        Deletes a booking and returns its seat, or None if the reference is not found.
+        """
+        with self._write_lock:
+            result = self.conn.execute(SELECT_SEAT, (booking_ref,)).fetchone()
+            if result is None:
+                return None
+            with self._writing():
+                self.conn.execute(DELETE_BOOKING, (booking_ref,))
+            self._written(1)
+            return result[0]
+
+    def iter_rows(self, query, params=(), chunk_size=FETCH_SIZE):
+        """
+        Yields the rows of a query, fetching chunk_size rows at a time with fetchmany,
+        so only one chunk is held in memory however large the result is.
+        Pending batched writes are committed first.
+        """
+        if self._pending:
+            self.flush()
+        with self._reader() as conn:
+            cursor = conn.execute(query, params)
+            try:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                cursor.close()
+
+    def booked_seats(self, chunk_size=FETCH_SIZE):
+        """
+        Yields (booking_ref, seat) for every stored booking.
+        """
+        return self.iter_rows(SELECT_BOOKED_SEATS, chunk_size=chunk_size)
+
+    def all_bookings(self, chunk_size=FETCH_SIZE):
+        """
+        Yields every stored booking as (booking_ref, first_name, last_name, passport, seat),
+        in booking reference order.
+        """
+        return self.iter_rows(SELECT_ALL_BOOKINGS, chunk_size=chunk_size)
+
+    @instrument("last_change", "db")
+    def last_change(self):
+        """
+        Returns the number of the most recent logged change, or 0 if nothing was ever logged.
+        """
+        with self._reader() as conn:
+            row = conn.execute(SELECT_LAST_CHANGE).fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, seq):
+        """
+        Yields (seq, action, booking_ref, seat) for every logged change after seq,
+        in order. action is "book" or "cancel".
+        """
+        return self.iter_rows(SELECT_CHANGES, (seq,))
+
+    @instrument("trim_log", "db")
+    def trim_log(self, seq):
+        """
+        Deletes the logged changes up to and including seq, once a snapshot covers them.
+        """
+        with self._write_lock:
+            self.flush()
+            self.conn.execute(DELETE_CHANGES, (seq,))
+
+    @instrument("find_booking", "db")
+    def find_booking(self, identifier):
+        """
+        Finds a booking by booking reference, passport number or full name.
+        The identifier must already be upper-cased. Each step is a primary-key or index lookup.
+        Returns (booking_ref, first_name, last_name, passport, seat), or None if nothing matches.
+        """
+        with self._reader() as conn:
+            for query in (SELECT_BY_REF, SELECT_BY_PASSPORT, SELECT_BY_NAME):
+                row = conn.execute(query, (identifier,)).fetchone()
+                if row is not None:
+                    return row
+        return None
+
+    @instrument("flush", "db")
+    def flush(self):
+        """
+        Commits any pending writes.
+        """
+        with self._write_lock:
+            if self._writer is not None and self._writer.in_transaction:
+                self._writer.execute("COMMIT")
+            self._pending = 0
+            self._batch_started = None
+
+    def close(self):
+        """
+        Commits pending writes and closes every connection.
+        The store opens new connections if it is used again.
+        """
+        with self._write_lock:
+            self.flush()
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._pool:
+            for conn in self._idle_readers:
+                conn.close()
+            self._open_readers -= len(self._idle_readers)
+            self._idle_readers = []
+
+    def _add_full_name_column(self):
+        # Databases created before the full_name column existed are upgraded in place
+        conn = self._writer
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(bookings)")]
+        if "full_name" in columns:
+            return
+        conn.execute("BEGIN")
+        conn.execute("ALTER TABLE bookings ADD COLUMN full_name TEXT")
+        # One statement inside SQLite, without reading the rows into Python first. The names are
+        # normalized by normalize_name itself, since SQLite's upper() only changes ASCII letters
+        conn.create_function("normalize_name", 2, normalize_name, deterministic=True)
+        conn.execute("UPDATE bookings SET full_name = normalize_name(first_name, last_name)")
+        conn.execute("COMMIT")
+
+    def _begin(self):
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+            self._batch_started = time.monotonic()
+
+    @contextmanager
+    def _writing(self):
+        """
+        Runs the writes of one call inside the current transaction, under a savepoint.
+        If a write fails only that call's changes are undone: batched writes made before it stay
+        pending, and a transaction left with nothing in it is ended so it does not hold the lock.
+        """
+        with self._write_lock:
+            self._begin()
+            self.conn.execute("SAVEPOINT write")
+            try:
+                yield
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK TO write")
+                self.conn.execute("RELEASE write")
+                if not self._pending:
+                    self.conn.execute("ROLLBACK")
+                    self._batch_started = None
+                raise
+            self.conn.execute("RELEASE write")
+
+    def _written(self, count):
+        self._pending += count
+        if (self.mode == IMMEDIATE
+                or self._pending >= self.batch_size
+                or time.monotonic() - self._batch_started >= self.flush_interval):
+            self.flush()
@@ -0,0 +1,194 @@
+# FC723 Project – Seat Booking Application
+
+# Group seat allocation for the seat booking applications.
+
+# Every row of a seat map is kept as a bitmap of its free seats, and the free runs of each row
+# (free seats side by side on the same side of the aisle) are filed in buckets by their length.
+# Finding seats for a group of N passengers looks in the buckets for N, N+1, ... and takes the
+# front-most row of the first bucket that is not empty, so the smallest run that fits is used and
+# the search time depends on the width of a row, not on the number of seats in the cabin.
+# If no run is long enough, the group is split across the aisle as evenly as possible.
+
+import heapq
+import threading
+
+from layouts import AISLE_COLUMN
+from seat_map import FREE
+
+
+class FreeRunIndex:
+    """
+    Keeps the free runs of every row of a seat map, updated through a watcher.
+    A run is a set of free seats next to each other between two aisles. A span is a chain of
+    runs that meet at an aisle, so a group seated in it is only split by the aisle.
+    """
+
+    def __init__(self, seat_map):
+        template = seat_map.template
+        self._seat_map = seat_map
+        self._width = len(template.columns)
+        self._seat_ids = template.seat_ids
+        # Column positions of each side of the aisle, and the section every column belongs to
+        self._sections = []
+        section = []
+        for c, col in enumerate(template.columns):
+            if col == AISLE_COLUMN:
+                if section:
+                    self._sections.append(tuple(section))
+                section = []
+            else:
+                section.append(c)
+        if section:
+            self._sections.append(tuple(section))
+        self._section_of = {c: s for s, section in enumerate(self._sections) for c in section}
+        # Last column of a section -> first column of the section across the aisle
+        self._across = {a[-1]: b[0] for a, b in zip(self._sections, self._sections[1:])}
+
+        rows = template.rows
+        self._free = [None] * rows
+        self._runs = [()] * rows
+        self._spans = [()] * rows
+        # Run length -> heap of rows that have a run (or span) of exactly that length.
+        # Entries are removed lazily: a row popped from a bucket it no longer belongs to is skipped.
+        self._run_buckets = {}
+        self._span_buckets = {}
+        self._lock = threading.Lock()
+        for row in range(rows):
+            self._update(row)
+        seat_map.watch(self._changed)
+
+    def _changed(self, positions):
+        width = self._width
+        with self._lock:
+            for row in {i // width for i in positions}:
+                self._update(row)
+
+    def refresh(self, seat_ids):
+        """
+        Reads the rows holding the given seats again, e.g. after losing a race to another writer.
+        """
+        index = self._seat_map.template.index
+        self._changed([index[seat_id] for seat_id in seat_ids])
+
+    def _update(self, row):
+        free = 0
+        for c, code in enumerate(self._seat_map.row_codes(row + 1)):
+            if code == FREE:
+                free |= 1 << c
+        if free == self._free[row]:
+            return
+        self._free[row] = free
+
+        runs = []
+        for section in self._sections:
+            run = []
+            for c in section:
+                if free >> c & 1:
+                    run.append(c)
+                elif run:
+                    runs.append(tuple(run))
+                    run = []
+            if run:
+                runs.append(tuple(run))
+        spans = []
+        chain = None
+        for run in runs:
+            if chain and self._across.get(chain[-1][-1]) == run[0]:
+                chain.append(run)
+                continue
+            if chain and len(chain) > 1:
+                spans.append(sum(chain, ()))
+            chain = [run]
+        if chain and len(chain) > 1:
+            spans.append(sum(chain, ()))
+
+        self._runs[row] = tuple(runs)
+        self._spans[row] = tuple(spans)
+        for length in {len(run) for run in runs}:
+            self._push(self._run_buckets, length, row)
+        for length in {len(span) for span in spans}:
+            self._push(self._span_buckets, length, row)
+
+    def _push(self, buckets, length, row):
+        bucket = buckets.setdefault(length, [])
+        heapq.heappush(bucket, row)
+        # Drop stale entries once they outnumber the rows, so a bucket never grows without bound
+        if len(bucket) > 2 * len(self._free):
+            stored = self._runs if buckets is self._run_buckets else self._spans
+            bucket[:] = sorted({r for r in bucket if any(len(s) == length for s in stored[r])})
+
+    def _first(self, buckets, stored, length):
+        """
+        Returns the front-most row with a run of exactly length seats, or None.
+        """
+        bucket = buckets.get(length)
+        while bucket:
+            row = bucket[0]
+            for run in stored[row]:
+                if len(run) == length:
+                    return row, run
+            heapq.heappop(bucket)
+        return None
+
+    def _split(self, span, size):
+        """
+        Picks size seats in a row of a span, keeping as many seats as possible on each side of the aisle.
+        """
+        best = None
+        for start in range(len(span) - size + 1):
+            window = span[start:start + size]
+            counts = {}
+            for c in window:
+                counts[self._section_of[c]] = counts.get(self._section_of[c], 0) + 1
+            score = max(counts.values())
+            if best is None or score < best[0]:
+                best = (score, window)
+        return best[1]
+
+    def find(self, size):
+        """
+        Returns the seat IDs of the best block of size free seats, or None if there is none.
+        The smallest run that fits is preferred, then the front-most row; if no run is long
+        enough the seats are split across the aisle.
+        """
+        with self._lock:
+            for length in range(size, self._width + 1):
+                found = self._first(self._run_buckets, self._runs, length)
+                if found:
+                    row, run = found
+                    return [self._seat_ids[row * self._width + c] for c in run[:size]]
+            for length in range(size, self._width + 1):
+                found = self._first(self._span_buckets, self._spans, length)
+                if found:
+                    row, span = found
+                    return [self._seat_ids[row * self._width + c] for c in self._split(span, size)]
+        return None
+
+
+def free_run_index(seat_map):
+    """
+    Returns the free run index of a seat map, building it on first use.
+    """
+    index = seat_map.free_runs
+    if index is None:
+        index = seat_map.free_runs = FreeRunIndex(seat_map)
+    return index
+
+
+def allocate_group(seat_map, size, registry):
+    """
+    Books the best block of size free seats under one new booking reference.
+    All seats are booked in one atomic commit; if another writer takes one of them first,
+    the next best block is tried. Returns (reference, seat IDs), or (None, None) if no block is free.
+    """
+    index = free_run_index(seat_map)
+    while True:
+        seats = index.find(size)
+        if seats is None:
+            return None, None
+        ref = registry.generate()
+        if seat_map.apply(dict.fromkeys(seats, "book"), dict.fromkeys(seats, ref)):
+            registry.share(ref, len(seats))
+            return ref, seats
+        registry.release(ref)
+        index.refresh(seats)
@@ -0,0 +1,151 @@
+# FC723 Project – Seat Booking Application
+
+# Flight inventory for the seat booking applications.
+
+# The inventory holds the seating charts of many flights at once. Each flight uses its own
+# layout template, its seat map is only created the first time it is used, and cabins that have
+# not been used for a while are written to SQLite and dropped from memory.
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+from layouts import get_template
+from seat_map import SeatMap
+
+
+class FlightInventory:
+    """
+    Keeps the seat maps of many flights in one process.
+    Cabins are allocated lazily on first access and kept in least-recently-used order.
+    When more than max_cabins are in memory, or a cabin is idle for longer than idle_seconds,
+    it is saved to the SQLite cabins table and removed from memory, so memory stays bounded
+    no matter how many flights are scheduled.
+    """
+
+    def __init__(self, db_path="inventory.db", max_cabins=1000, idle_seconds=None):
+        self.max_cabins = max_cabins
+        self.idle_seconds = idle_seconds
+        # Layout template name of every known flight
+        self._layouts = {}
+        # Cabins currently in memory, oldest access first: flight_id -> (seat map, last used)
+        self._cabins = OrderedDict()
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS cabins (
+                flight_id TEXT PRIMARY KEY,
+                layout TEXT,
+                status BLOB,
+                refs TEXT
+            )
+        ''')
+        self._conn.commit()
+
+    def __contains__(self, flight_id):
+        if flight_id in self._layouts:
+            return True
+        row = self._conn.execute("SELECT 1 FROM cabins WHERE flight_id = ?", (flight_id,)).fetchone()
+        return row is not None
+
+    def __len__(self):
+        """
+        Returns the number of cabins currently held in memory.
+        """
+        return len(self._cabins)
+
+    def add_flight(self, flight_id, layout="standard"):
+        """
+        Registers a flight and the name of its layout template.
+        No seat map is allocated until the flight is first used.
+        """
+        get_template(layout)  # fail early on an unknown layout
+        self._layouts[flight_id] = layout
+
+    def cabin(self, flight_id):
+        """
+        Returns the seat map for a flight, creating or reloading it if it is not in memory.
+        Raises KeyError if the flight is unknown.
+        """
+        entry = self._cabins.get(flight_id)
+        if entry is not None:
+            self._cabins.move_to_end(flight_id)
+            seat_map = entry[0]
+        else:
+            seat_map = self._load(flight_id)
+            if seat_map is None:
+                if flight_id not in self._layouts:
+                    raise KeyError(flight_id)
+                seat_map = SeatMap(get_template(self._layouts[flight_id]))
+        self._cabins[flight_id] = (seat_map, time.monotonic())
+        self._evict_over_limit()
+        return seat_map
+
+    def evict(self, flight_id):
+        """
+        Saves a cabin to SQLite and removes it from memory.
+        """
+        entry = self._cabins.pop(flight_id, None)
+        if entry is not None:
+            with self._conn:
+                self._save(flight_id, entry[0])
+
+    def evict_idle(self, idle_seconds=None):
+        """
+        Evicts every cabin that has not been used for idle_seconds.
+        Returns the number of cabins evicted.
+        """
+        if idle_seconds is None:
+            idle_seconds = self.idle_seconds
+        if idle_seconds is None:
+            return 0
+        cutoff = time.monotonic() - idle_seconds
+        evicted = 0
+        with self._conn:
+            # Cabins are kept in access order, so the idle ones are at the front
+            while self._cabins:
+                flight_id, (seat_map, last_used) = next(iter(self._cabins.items()))
+                if last_used > cutoff:
+                    break
+                del self._cabins[flight_id]
+                self._save(flight_id, seat_map)
+                evicted += 1
+        return evicted
+
+    def flush(self):
+        """
+        Saves every cabin in memory to SQLite without evicting it.
+        """
+        with self._conn:
+            for flight_id, (seat_map, _) in self._cabins.items():
+                self._save(flight_id, seat_map)
+
+    def close(self):
+        """
+        Saves all cabins and closes the database connection.
+        """
+        self.flush()
+        self._conn.close()
+
+    def _evict_over_limit(self):
+        if len(self._cabins) <= self.max_cabins and self.idle_seconds is None:
+            return
+        with self._conn:
+            while len(self._cabins) > self.max_cabins:
+                flight_id, (seat_map, _) = self._cabins.popitem(last=False)
+                self._save(flight_id, seat_map)
+        self.evict_idle()
+
+    def _save(self, flight_id, seat_map):
+        status, refs = seat_map.dump()
+        self._conn.execute("INSERT OR REPLACE INTO cabins VALUES (?, ?, ?, ?)",
+                           (flight_id, seat_map.template.name, status, json.dumps(refs)))
+
+    def _load(self, flight_id):
+        row = self._conn.execute("SELECT layout, status, refs FROM cabins WHERE flight_id = ?",
+                                 (flight_id,)).fetchone()
+        if row is None:
+            return None
+        layout, status, refs = row
+        self._layouts[flight_id] = layout
+        return SeatMap.restore(get_template(layout), status, json.loads(refs))
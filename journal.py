@@ -0,0 +1,202 @@
+# FC723 Project – Seat Booking Application
+
+# Append-only transaction journal for the in-memory seat booking applications.
+
+# Every change to the seating chart (a booking, a freed seat or a modified booking) is appended to
+# the journal as one line listing the new value of each changed seat, e.g.
+#     12A=K4M6SOBQ
+#     12A=F 14C=Q7RT2ZLA
+# At startup the journal is replayed onto a fresh seating chart, so bookings survive a restart
+# without a database round trip per change. Every compact_every changes (and on close) the whole
+# chart is written as a binary snapshot (see snapshot.py) and the journal is emptied, so replay
+# never has to read more than compact_every lines.
+#
+# Durability: each line is handed to the operating system as soon as the change is made, so a
+# crash of the process loses nothing. The file is fsynced when sync_every lines are pending, when
+# sync_interval seconds have passed since the first pending line (checked on the next change), or
+# on flush()/close(); a power loss can lose the lines written since the last fsync.
+# A line cut short by a crash is ignored and removed on the next start.
+#
+#     python journal.py     check crash recovery and the snapshot round trip
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from layouts import get_template
+from seat_map import SeatMap
+from snapshot import load_snapshot, write_snapshot
+
+
+class Journal:
+    """
+    Records the changes of a seat map in an append-only file and replays them on startup.
+    """
+
+    def __init__(self, path, sync_every=100, sync_interval=0.05, compact_every=10000):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+        self._seat_map = None
+        self._file = None
+        self._pending = 0
+        self._first_pending = None
+        self._lines = 0
+        self._lock = threading.Lock()
+
+    def recover(self, seat_map):
+        """
+        Brings a freshly initialized seat map up to date from the snapshot and the journal,
+        then records every later change of the seat map. Returns the seat map.
+        """
+        loaded = load_snapshot(self.snapshot_path, seat_map.template)
+        if loaded is not None:
+            saved = loaded[0]
+            changes = {seat_id: value for seat_id, value in saved.items() if value != seat_map[seat_id]}
+            if changes:
+                seat_map.replay(changes)
+
+        valid_end = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as journal_file:
+                for line in journal_file:
+                    if not line.endswith(b"\n"):
+                        # Last line cut short by a crash
+                        break
+                    seat_map.replay(dict(change.split("=", 1) for change in line.decode("ascii").split()))
+                    valid_end += len(line)
+                    self._lines += 1
+
+        self._file = open(self.path, "ab")
+        if self._file.tell() > valid_end:
+            self._file.truncate(valid_end)
+        self._seat_map = seat_map
+        seat_map.watch(self._record)
+        return seat_map
+
+    def _record(self, positions):
+        seat_map = self._seat_map
+        seat_ids = seat_map.template.seat_ids
+        # The new values are read back from the seat map; if another change to the same seats
+        # follows, its own line records the later value, so replaying in order ends in the same state
+        line = " ".join([f"{seat_ids[i]}={seat_map[seat_ids[i]]}" for i in positions]) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line.encode("ascii"))
+            self._file.flush()
+            self._lines += 1
+            self._pending += 1
+            if self._first_pending is None:
+                self._first_pending = time.monotonic()
+            if (self._pending >= self.sync_every
+                    or time.monotonic() - self._first_pending >= self.sync_interval):
+                self._sync()
+            if self._lines >= self.compact_every:
+                self._compact()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._first_pending = None
+
+    def _compact(self):
+        # The snapshot is written before the journal is emptied; if the process dies in between,
+        # replaying the old lines on top of the snapshot gives the same state again
+        self._sync()
+        write_snapshot(self.snapshot_path, self._seat_map, 0)
+        self._file.truncate(0)
+        self._sync()
+        self._lines = 0
+
+    def flush(self):
+        """
+        Forces every journal line written so far to disk.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+
+    def compact(self):
+        """
+        Writes a snapshot of the seat map and empties the journal.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._compact()
+
+    def close(self):
+        """
+        Compacts the journal if it holds any lines and closes it.
+        """
+        with self._lock:
+            if self._file is None:
+                return
+            if self._lines:
+                self._compact()
+            else:
+                self._sync()
+            self._file.close()
+            self._file = None
+
+
+def recovery_check():
+    """
+    Checks crash recovery in a temporary directory and prints the outcome.
+    Bookings, a freed seat and a modified booking are journaled, the process "crashes" in the middle
+    of writing a line, and a new seat map recovered from the journal must hold exactly the same seats,
+    with the torn line removed from the file. The journal is then compacted, one more change is
+    made, and a seat map recovered from the snapshot and that change must match again.
+    A snapshot written with write_snapshot() must also load back unchanged, with its change number.
+    Returns True if every check passed.
+    """
+    template = get_template("standard")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "seating.journal")
+        journal = Journal(path, compact_every=1000)
+        seating = journal.recover(SeatMap(template))
+        seating.apply({"1A": "book", "1B": "book", "2C": "book"}, {"1A": "REF00001", "1B": "REF00002"})
+        seating.apply({"1B": "free"})
+        seating.apply({"1A": "free", "3D": "book"}, {"3D": "REF00003"})
+        expected = dict(seating)
+        journal.flush()
+        valid_size = os.path.getsize(path)
+        # A crash while the next line was being written: close the file without compacting
+        journal._file.write(b"5C=REF0")
+        journal._file.close()
+        journal._file = None
+
+        journal = Journal(path, compact_every=1000)
+        seating = journal.recover(SeatMap(template))
+        results.append(("Replay after a torn last line", dict(seating) == expected
+                        and os.path.getsize(path) == valid_size))
+
+        journal.compact()
+        seating.apply({"4E": "book"}, {"4E": "REF00004"})
+        expected = dict(seating)
+        journal.flush()
+        journal._file.close()
+        journal._file = None
+        journal = Journal(path)
+        seating = journal.recover(SeatMap(template))
+        results.append(("Replay on top of a compacted snapshot", dict(seating) == expected))
+        journal.close()
+
+        snapshot_path = os.path.join(directory, "seating.snapshot")
+        write_snapshot(snapshot_path, seating, 42)
+        loaded = load_snapshot(snapshot_path, template)
+        results.append(("Snapshot round trip", loaded is not None and loaded[1] == 42
+                        and loaded[0].dump() == seating.dump()
+                        and loaded[0].occupancy() == seating.occupancy()))
+    for name, passed in results:
+        print(f"{name}: {'ok' if passed else 'CHECK FAILED'}")
+    return all(passed for _, passed in results)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if recovery_check() else 1)
@@ -0,0 +1,112 @@
+# FC723 Project – Seat Booking Application
+
+# Aircraft layout templates for the seat booking applications.
+
+# A layout is described once (rows, columns and storage seats) and compiled into read-only
+# lookup tables the first time it is used. New seating charts are then created by copying the
+# template's prebuilt status buffer instead of working out every seat's state again.
+
+from collections import namedtuple
+
+from seat_map import FREE, AISLE, STORAGE, SEAT_CLASSES
+
+# Layout definitions: 80 rows of seats A-C, an aisle, then seats D-F,
+# with rows 79 and 80 in columns D, E and F used as storage areas
+LAYOUT_DEFINITIONS = {
+    "standard": {
+        "rows": 80,
+        "columns": ('A', 'B', 'C', 'aisle', 'D', 'E', 'F'),
+        "storage_rows": (79, 80),
+        "storage_columns": ('D', 'E', 'F'),
+    },
+}
+
+# Name of the column that marks the aisle
+AISLE_COLUMN = 'aisle'
+
+LayoutTemplate = namedtuple("LayoutTemplate", [
+    "name",             # layout name
+    "rows",             # number of rows, numbered from 1
+    "columns",          # column names, including the aisle
+    "index",            # seat ID (e.g. "12A") -> position in the status buffer
+    "seat_ids",         # position in the status buffer -> seat ID
+    "aisle_positions",  # column positions of the aisle
+    "bookable_mask",    # one byte per seat: 1 if the seat can be booked
+    "storage_mask",     # one byte per seat: 1 if the seat is a storage area
+    "buffer",           # initial status code of every seat
+    "column_classes",   # seat class of every column (index into SEAT_CLASSES), None for the aisle
+    "row_free",         # initial number of free seats in every row
+    "class_free",       # initial number of free seats of every seat class
+])
+
+# Compiled templates, keyed by layout name
+_templates = {}
+
+
+def compile_template(name, rows, columns, storage_rows=(), storage_columns=()):
+    """
+    Compiles a layout description into a LayoutTemplate.
+    Every table is built here once, so creating a seating chart is a single buffer copy.
+    """
+    columns = tuple(columns)
+    width = len(columns)
+    aisle_positions = tuple(c for c, col in enumerate(columns) if col == AISLE_COLUMN)
+    storage_positions = {c for c, col in enumerate(columns) if col in storage_columns}
+    buffer = bytearray(rows * width)
+    storage_mask = bytearray(rows * width)
+    for row in storage_rows:
+        for c in storage_positions:
+            storage_mask[(row - 1) * width + c] = 1
+    for i in range(len(buffer)):
+        if i % width in aisle_positions:
+            buffer[i] = AISLE
+        elif storage_mask[i]:
+            buffer[i] = STORAGE
+    bookable_mask = bytes(1 if code == FREE else 0 for code in buffer)
+    seat_positions = [c for c in range(width) if c not in aisle_positions]
+    column_classes = []
+    for c in range(width):
+        if c in aisle_positions:
+            column_classes.append(None)
+        elif c in (seat_positions[0], seat_positions[-1]):
+            column_classes.append(SEAT_CLASSES.index('window'))
+        elif c - 1 in aisle_positions or c + 1 in aisle_positions:
+            column_classes.append(SEAT_CLASSES.index('aisle'))
+        else:
+            column_classes.append(SEAT_CLASSES.index('middle'))
+    row_free = tuple(sum(bookable_mask[r * width:(r + 1) * width]) for r in range(rows))
+    class_free = tuple(sum(bookable_mask[i] for i in range(len(buffer)) if column_classes[i % width] == k)
+                       for k in range(len(SEAT_CLASSES)))
+    index = {f"{row}{col}": (row - 1) * width + c
+             for row in range(1, rows + 1)
+             for c, col in enumerate(columns)}
+    seat_ids = tuple(index)
+    return LayoutTemplate(name, rows, columns, index, seat_ids, aisle_positions,
+                          bookable_mask, bytes(storage_mask), bytes(buffer),
+                          tuple(column_classes), row_free, class_free)
+
+
+def register_template(name, rows, columns, storage_rows=(), storage_columns=()):
+    """
+    Adds a new layout definition and returns its compiled template.
+    """
+    LAYOUT_DEFINITIONS[name] = {
+        "rows": rows,
+        "columns": tuple(columns),
+        "storage_rows": tuple(storage_rows),
+        "storage_columns": tuple(storage_columns),
+    }
+    _templates.pop(name, None)
+    return get_template(name)
+
+
+def get_template(name="standard"):
+    """
+    Returns the compiled template for a layout, compiling it on first use.
+    Raises KeyError if the layout is not defined.
+    """
+    template = _templates.get(name)
+    if template is None:
+        template = compile_template(name, **LAYOUT_DEFINITIONS[name])
+        _templates[name] = template
+    return template
@@ -0,0 +1,228 @@
+# FC723 Project – Seat Booking Application
+
+# Passenger manifest import and export for the SQLite version of the application.
+
+# The manifest lists every booking in the bookings database as CSV or JSON lines. Bookings are
+# streamed from SQLite a chunk at a time and written as they arrive, so an export runs in constant
+# memory however many bookings the table holds.
+#
+# An import reads a manifest in the same formats one row at a time. Each row is checked with the
+# rules of task 2B final (passport number format, and a bookable seat that nobody holds yet) and
+# written to SQLite in transactions of IMPORT_BATCH_SIZE bookings. A row keeps the booking reference
+# of its manifest if it is well-formed and not in use, so an export imported into another database
+# keeps every passenger's reference; a new one is only drawn when it is missing or taken.
+# Only the current batch is held in memory, besides the seats and references already in use.
+# A row that cannot be read or fails a check is counted as rejected with its reason; it never
+# stops the import.
+#
+#     python manifest.py export manifest.csv            CSV with a header row
+#     python manifest.py export manifest.jsonl          one JSON object per booking
+#     python manifest.py export - --format jsonl             write to standard output
+#     python manifest.py import manifest.csv            add the bookings of a manifest
+#     (--db <file> selects another database, bookings.db by default)
+
+import csv
+import json
+import sys
+
+from booking_refs import REFERENCE_PATTERN, ReferenceRegistry, ReferenceSequence
+from booking_store import BookingStore, PASSPORT_PATTERN
+from seat_codec import get_codec
+
+MANIFEST_FIELDS = ("booking_ref", "first_name", "last_name", "passport", "seat")
+MANIFEST_FORMATS = ("csv", "jsonl")
+
+# Layout the seats of an import are checked against: the seating chart the bookings database is
+# loaded into by task 2B final, so no booking can name a seat the application does not have
+IMPORT_LAYOUT = "standard"
+
+# Bookings written per transaction by an import
+IMPORT_BATCH_SIZE = 500
+
+
+def manifest_format(path, file_format=None):
+    """
+    Returns the manifest format to use: the given one, or the one named by the file extension.
+    """
+    if file_format is None:
+        file_format = "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+    if file_format not in MANIFEST_FORMATS:
+        raise ValueError(f"Unknown manifest format: {file_format}")
+    return file_format
+
+
+def write_manifest(bookings, out, file_format="csv"):
+    """
+    Writes bookings ((booking_ref, first_name, last_name, passport, seat) tuples) to an open
+    text file as they are produced. Returns the number of bookings written.
+    """
+    count = 0
+    if file_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(MANIFEST_FIELDS)
+        for booking in bookings:
+            writer.writerow(booking)
+            count += 1
+    else:
+        for booking in bookings:
+            out.write(json.dumps(dict(zip(MANIFEST_FIELDS, booking))) + "\n")
+            count += 1
+    return count
+
+
+def export_manifest(store, path, file_format=None):
+    """
+    Exports every booking in the store to a manifest file, or to standard output when path is "-".
+    Returns the number of bookings exported.
+    """
+    file_format = manifest_format(path, file_format)
+    if path == "-":
+        return write_manifest(store.all_bookings(), sys.stdout, file_format)
+    with open(path, "w", newline="") as out:
+        return write_manifest(store.all_bookings(), out, file_format)
+
+
+def read_manifest(source, file_format="csv"):
+    """
+    Reads the rows of a manifest from an open text file one at a time.
+    Yields (row number, booking_ref, first_name, last_name, passport, seat, problem). Fields are
+    strings, or None when missing. problem is None, or the reason a JSON line could not be read at
+    all (its fields are then None), so one bad line never stops an import.
+    """
+    if file_format == "csv":
+        # Plain csv.reader with the column positions taken from the header, which is much
+        # faster than building a dictionary for every row
+        reader = csv.reader(source)
+        header = next(reader, [])
+        positions = [header.index(field) if field in header else None for field in MANIFEST_FIELDS]
+        for number, row in enumerate(reader, 1):
+            yield (number, *[row[p] if p is not None and p < len(row) else None for p in positions], None)
+        return
+    number = 0
+    for line in source:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield (number, None, None, None, None, None, "Row is not valid JSON.")
+            continue
+        if not isinstance(row, dict):
+            yield (number, None, None, None, None, None, "Row is not a JSON object.")
+            continue
+        # A passport number written as a JSON number is read as its digits
+        yield (number, *[None if row.get(field) is None else str(row[field])
+                         for field in MANIFEST_FIELDS], None)
+
+
+def import_bookings(store, rows, batch_size=IMPORT_BATCH_SIZE, errors=None, max_errors=100):
+    """
+    Adds the bookings of manifest rows (as yielded by read_manifest) to the store.
+    Rows are checked like a booking made in task 2B final: the passport must be 6-15 letters or
+    digits, and the seat must be a bookable seat of IMPORT_LAYOUT (the seating chart of task 2B
+    final) that is not booked in the store or by an earlier row. A valid row keeps its booking_ref
+    if it is well-formed and not used in the store or by an earlier row; otherwise a new reference
+    is drawn. Valid rows are written batch_size at a time, each batch in one transaction.
+    The first max_errors rejected rows are appended to errors as (row number, reason) if a list is
+    given. Returns (imported, rejected).
+    """
+    codec = get_codec(IMPORT_LAYOUT)
+    taken = {seat for _, seat in store.booked_seats()}
+    registry = ReferenceRegistry(sequence=ReferenceSequence())
+    registry.load_from_db(store.conn)
+    imported = rejected = 0
+    batch = []
+    for number, ref, first, last, passport, seat, problem in rows:
+        if problem is not None:
+            reason = problem
+        elif not first or not last or not passport or not seat:
+            reason = "Missing name, passport or seat."
+        else:
+            passport = passport.strip().upper()
+            seat = seat.strip().upper()
+            if PASSPORT_PATTERN.fullmatch(passport) is None:
+                reason = f"Invalid passport number {passport}."
+            elif not codec.is_bookable(seat):
+                reason = f"Seat {seat} cannot be booked."
+            elif seat in taken:
+                reason = f"Seat {seat} is already booked."
+            else:
+                taken.add(seat)
+                ref = ref.strip().upper() if ref else ""
+                if REFERENCE_PATTERN.fullmatch(ref) is None or not registry.claim(ref):
+                    ref = None
+                batch.append((ref, first.strip(), last.strip(), passport, seat))
+                if len(batch) >= batch_size:
+                    imported += _write_batch(store, registry, batch)
+                    batch = []
+                continue
+        rejected += 1
+        if errors is not None and len(errors) < max_errors:
+            errors.append((number, reason))
+    if batch:
+        imported += _write_batch(store, registry, batch)
+    return imported, rejected
+
+
+def _write_batch(store, registry, batch):
+    # Draws new references in one call for the bookings of the batch that have none, then writes it
+    refs = iter(registry.generate_many(sum(booking[0] is None for booking in batch)))
+    store.add_bookings([(ref or next(refs), *booking) for ref, *booking in batch])
+    return len(batch)
+
+
+def import_manifest(store, path, file_format=None, errors=None):
+    """
+    Imports a manifest file, or standard input when path is "-", into the store.
+    See import_bookings for the checks made on every row. Returns (imported, rejected).
+    """
+    file_format = manifest_format(path, file_format)
+    if path == "-":
+        return import_bookings(store, read_manifest(sys.stdin, file_format), errors=errors)
+    with open(path, newline="", errors="replace") as source:
+        return import_bookings(store, read_manifest(source, file_format), errors=errors)
+
+
+def main(args):
+    db_path = "bookings.db"
+    file_format = None
+    if "--db" in args:
+        position = args.index("--db")
+        db_path = args[position + 1]
+        del args[position:position + 2]
+    if "--format" in args:
+        position = args.index("--format")
+        file_format = args[position + 1]
+        del args[position:position + 2]
+    if len(args) != 2 or args[0] not in ("export", "import"):
+        print("Usage: python manifest.py export|import <file> [--format csv|jsonl] [--db bookings.db]",
+              file=sys.stderr)
+        return 2
+    try:
+        file_format = manifest_format(args[1], file_format)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 2
+    store = BookingStore(db_path)
+    try:
+        if args[0] == "export":
+            count = export_manifest(store, args[1], file_format)
+            print(f"{count} bookings exported.", file=sys.stderr)
+            return 0
+        errors = []
+        imported, rejected = import_manifest(store, args[1], file_format, errors)
+    except (OSError, KeyError, ValueError) as error:
+        print(f"{args[0].capitalize()} failed: {error}", file=sys.stderr)
+        return 1
+    finally:
+        store.close()
+    # Only the first few rejected rows are listed
+    for number, reason in errors[:10]:
+        print(f"Row {number}: {reason}", file=sys.stderr)
+    print(f"{imported} bookings imported, {rejected} rows rejected.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
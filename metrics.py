@@ -0,0 +1,201 @@
+# FC723 Project – Seat Booking Application
+
+# Instrumentation for the seat booking applications.
+
+# Booking functions, database calls and chart rendering are wrapped with @instrument, which counts
+# calls and records their latency in a histogram. Other events (such as retries while generating
+# a booking reference) are counted with increment(). Metrics can be exported as Prometheus text or
+# JSON, to a file or from a small HTTP endpoint.
+#
+# Instrumentation is off unless the FC723_METRICS environment variable is set to 1 when the
+# program starts. When it is off, @instrument returns the function unchanged and increment() returns
+# straight away, so the booking code runs exactly as before.
+#
+#     FC723_METRICS=1                       turn instrumentation on
+#     FC723_METRICS_FILE=metrics.prom       write all metrics to this file when the program exits
+#                                           (JSON if the name ends in .json, Prometheus text otherwise)
+#     FC723_METRICS_PORT=9723               serve metrics over HTTP (booking server only),
+#                                           at /metrics (Prometheus text) and /metrics.json
+
+import atexit
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("FC723_METRICS") == "1"
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.000001, 0.000005, 0.00001, 0.00005, 0.0001, 0.0005,
+                   0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, float("inf"))
+
+METRIC_PREFIX = "fc723"
+
+
+class Histogram:
+    """
+    Counts observations in fixed latency buckets and keeps their total.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+# Total time per group, counting only the outermost call when instrumented calls are nested
+# (e.g. add_booking committing through flush), so database time is not counted twice
+_group_seconds = {}
+_depth = threading.local()
+
+
+def observe(name, seconds, group=None):
+    """
+    Records one call of name that took the given number of seconds,
+    adding the time to the group's total if a group is given.
+    """
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.observe(seconds)
+        if group is not None:
+            _group_seconds[group] = _group_seconds.get(group, 0.0) + seconds
+
+
+def increment(name, amount=1):
+    """
+    Adds amount to the counter called name.
+    """
+    if not ENABLED:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def instrument(name, group="app"):
+    """
+    Decorator that records the call count and latency of a function under name.
+    group separates application functions ("app") from database calls ("db") and
+    chart rendering ("chart"). Returns the function unchanged when instrumentation is off.
+    """
+    def decorate(function):
+        if not ENABLED:
+            return function
+        key = f"{group}:{name}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            depth = getattr(_depth, group, 0)
+            setattr(_depth, group, depth + 1)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                setattr(_depth, group, depth)
+                observe(key, time.perf_counter() - started, group if depth == 0 else None)
+        return wrapper
+    return decorate
+
+
+def snapshot():
+    """
+    Returns every metric as a dictionary:
+    {"functions": {"group:name": {"calls", "seconds", "buckets"}}, "counters": {name: value},
+     "group_seconds": {group: total time}, "db_seconds": total time spent in database calls}.
+    """
+    with _lock:
+        functions = {
+            key: {"calls": h.count, "seconds": h.sum,
+                  "buckets": dict(zip(map(str, LATENCY_BUCKETS), h.buckets))}
+            for key, h in _histograms.items()
+        }
+        counters = dict(_counters)
+        group_seconds = dict(_group_seconds)
+    return {"functions": functions, "counters": counters, "group_seconds": group_seconds,
+            "db_seconds": group_seconds.get("db", 0.0)}
+
+
+def to_json():
+    return json.dumps(snapshot(), indent=2)
+
+
+def to_prometheus():
+    """
+    Returns every metric in the Prometheus text exposition format.
+    """
+    lines = [f"# TYPE {METRIC_PREFIX}_call_seconds histogram"]
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+        group_seconds = sorted(_group_seconds.items())
+    for key, h in histograms:
+        group, name = key.split(":", 1)
+        labels = f'group="{group}",function="{name}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, h.buckets):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{METRIC_PREFIX}_call_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f"{METRIC_PREFIX}_call_seconds_sum{{{labels}}} {h.sum}")
+        lines.append(f"{METRIC_PREFIX}_call_seconds_count{{{labels}}} {h.count}")
+    lines.append(f"# TYPE {METRIC_PREFIX}_group_seconds_total counter")
+    for group, seconds in group_seconds:
+        lines.append(f'{METRIC_PREFIX}_group_seconds_total{{group="{group}"}} {seconds}')
+    for name, value in counters:
+        lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+        lines.append(f"{METRIC_PREFIX}_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    """
+    Writes every metric to a file, as JSON if the name ends in .json and Prometheus text otherwise.
+    """
+    with open(path, "w") as metrics_file:
+        metrics_file.write(to_json() if path.endswith(".json") else to_prometheus())
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/metrics":
+            body, content_type = to_prometheus(), "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            body, content_type = to_json(), "application/json"
+        else:
+            self.send_error(404)
+            return
+        body = body.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are not logged
+        pass
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """
+    Serves the metrics over HTTP from a background thread and returns the server.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if ENABLED and os.environ.get("FC723_METRICS_FILE"):
+    atexit.register(write_metrics, os.environ["FC723_METRICS_FILE"])
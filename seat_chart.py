@@ -0,0 +1,114 @@
+# FC723 Project – Seat Booking Application
+
+# Seating chart renderer for the seat booking applications.
+
+# The renderer keeps the rendered text of every row. When a seat is booked, freed or modified
+# only that seat's row is rendered again, and the whole chart is written with a single write
+# call, so showing an unchanged chart again costs almost nothing.
+#
+# Rendering never blocks a writer: a writer only marks its row under a short lock, and a chart
+# rendered while a write was being made is returned but not kept, so the next render picks up the change.
+
+import sys
+import threading
+from collections import namedtuple
+
+from metrics import instrument
+from seat_map import FREE, AISLE, STORAGE, BOOKED, HELD
+
+ChartStyle = namedtuple("ChartStyle", [
+    "title",          # line printed above the chart
+    "header_prefix",  # text before the column letters in the header
+    "aisle_label",    # text shown for the aisle column in the header
+    "row_prefix",     # format for the row number at the start of each row
+    "symbols",        # symbol shown for each status code
+    "footer",         # text written after the last row
+])
+
+# Chart styles used by the different versions of the application
+CHART_STYLES = {
+    # Booking status chart of task 1B, task 4 and task 5: booked seats are shown as "A"
+    "status": ChartStyle("\nCurrent Booking Status:", "    ", "", "{:>3} ",
+                         {FREE: 'F', AISLE: 'X', STORAGE: 'S', BOOKED: 'A', HELD: 'H'}, "\n"),
+    # Seating layout of task 2B: booked seats are shown as "A" (assigned)
+    "assigned": ChartStyle("\nSeating Layout (F = Free, A = Assigned, X = Aisle)", "     ", " ",
+                           "{:>2}   ", {FREE: 'F', AISLE: 'X', STORAGE: 'S', BOOKED: 'A', HELD: 'H'}, ""),
+    # Seating layout of the database version: booked seats are shown as "R" (reserved)
+    "reserved": ChartStyle("\nSeating Layout (F = Free, X = Aisle, S = Storage, R = Reserved)", "     ",
+                           " ", "{:>2}   ",
+                           {FREE: 'F', AISLE: 'X', STORAGE: 'S', BOOKED: 'R', HELD: 'H'}, ""),
+}
+
+
+class SeatChart:
+    """
+    Renders a seat map as text, caching the line of every row.
+    The renderer watches the seat map and only re-renders rows whose seats have changed.
+    """
+
+    def __init__(self, seat_map, style):
+        self.style = style
+        self._width = len(seat_map.columns)
+        self._header = style.header_prefix + "   ".join(
+            col if col != 'aisle' else style.aisle_label for col in seat_map.columns)
+        self._lines = [None] * seat_map.rows
+        self._dirty = set(range(seat_map.rows))
+        self._text = None
+        # Bumped by every change, so a chart rendered while a write was made is not cached
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Only one thread renders at a time, so an older render never overwrites a newer row line
+        self._render_lock = threading.Lock()
+        seat_map.watch(self._invalidate)
+
+    def _invalidate(self, positions):
+        width = self._width
+        with self._lock:
+            for i in positions:
+                self._dirty.add(i // width)
+            self._generation += 1
+            self._text = None
+
+    @instrument("render_chart", "chart")
+    def render(self, seat_map):
+        """
+        Returns the whole chart as one string, re-rendering only the rows that changed.
+        """
+        text = self._text
+        if text is not None:
+            return text
+        with self._render_lock:
+            with self._lock:
+                generation = self._generation
+                dirty, self._dirty = self._dirty, set()
+            symbols = self.style.symbols
+            row_prefix = self.style.row_prefix
+            for r in dirty:
+                codes = seat_map.row_codes(r + 1)
+                self._lines[r] = row_prefix.format(r + 1) + "   ".join([symbols[c] for c in codes]) + "\n"
+            text = "".join([self.style.title, "\n", self._header, "\n", *self._lines, self.style.footer])
+            with self._lock:
+                # A row changed during the render is marked dirty again, so only keep an untouched chart
+                if generation == self._generation:
+                    self._text = text
+        return text
+
+
+def chart_for(seat_map, style="status"):
+    """
+    Returns the renderer for a seat map in the given style, creating it on first use.
+    """
+    charts = seat_map.charts
+    if charts is None:
+        charts = seat_map.charts = {}
+    chart = charts.get(style)
+    if chart is None:
+        chart = charts[style] = SeatChart(seat_map, CHART_STYLES[style])
+    return chart
+
+
+def write_chart(seat_map, style="status", out=None):
+    """
+    Writes the seating chart with a single buffered write.
+    """
+    (out or sys.stdout).write(chart_for(seat_map, style).render(seat_map))
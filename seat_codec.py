@@ -0,0 +1,125 @@
+# FC723 Project – Seat Booking Application
+
+# Seat ID parsing for the seat booking applications.
+
+# A seat codec converts seat IDs such as "12A" to (row, column) pairs and back for one layout.
+# Every seat ID of the layout (in upper and lower case) is looked up in a table built once from
+# the layout template, so parsing and validating never slice strings, run a regular expression or
+# build a new pair: the same stored tuple is returned every time. Every path that reads a seat ID
+# from a user, a manifest or a test workload checks it here.
+#
+#     python seat_codec.py [count]     time parse_many, validate_many and format_many on count seat IDs
+
+import random
+import sys
+import time
+
+from layouts import AISLE_COLUMN, get_template
+
+
+class SeatCodec:
+    """
+    Parses and formats the seat IDs of one layout.
+    Rows are numbered from 1 and columns are positions in the layout's column list,
+    as used by SeatMap.status(). The aisle is not a seat and never parses.
+    parse(seat_id) returns the (row, column) pair of a seat ID, or None if the layout has no such seat;
+    is_valid(seat_id) returns whether it has, and is_bookable(seat_id) whether that seat can be booked
+    (it is neither an aisle nor storage in the layout).
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self.width = len(template.columns)
+        # Seat ID -> (row, column), and position in the status buffer -> seat ID (None for the aisle)
+        self._pairs = {}
+        self._ids = [None] * len(template.seat_ids)
+        for seat_id, i in template.index.items():
+            row, col = divmod(i, self.width)
+            column = template.columns[col]
+            if column == AISLE_COLUMN:
+                continue
+            pair = (row + 1, col)
+            self._pairs[seat_id] = pair
+            self._pairs[f"{row + 1}{column.lower()}"] = pair
+            self._ids[i] = seat_id
+        # Every seat ID of the layout, row by row
+        self.seat_ids = tuple(seat_id for seat_id in self._ids if seat_id is not None)
+        bookable = frozenset(seat_id for seat_id, (row, col) in self._pairs.items()
+                             if template.bookable_mask[(row - 1) * self.width + col])
+        # Bound lookups, so bulk calls run without any Python code per seat
+        self.parse = self._pairs.get
+        self.is_valid = self._pairs.__contains__
+        self.is_bookable = bookable.__contains__
+
+    def format(self, row, col):
+        """
+        Returns the seat ID at a 1-based row and a 0-based column position,
+        or None if there is no seat there.
+        """
+        if 1 <= row <= self.template.rows and 0 <= col < self.width:
+            return self._ids[(row - 1) * self.width + col]
+        return None
+
+    def parse_many(self, seat_ids):
+        """
+        Returns the (row, column) pair of every seat ID, with None for invalid IDs.
+        """
+        return list(map(self._pairs.get, seat_ids))
+
+    def validate_many(self, seat_ids):
+        """
+        Returns True or False for every seat ID.
+        """
+        return list(map(self._pairs.__contains__, seat_ids))
+
+    def format_many(self, pairs):
+        """
+        Returns the seat ID of every (row, column) pair, with None where there is no seat.
+        """
+        ids, width, rows = self._ids, self.width, self.template.rows
+        return [ids[(row - 1) * width + col] if 1 <= row <= rows and 0 <= col < width else None
+                for row, col in pairs]
+
+
+# Codecs built so far, keyed by layout name
+_codecs = {}
+
+
+def get_codec(name="standard"):
+    """
+    Returns the seat codec of a layout, building it on first use.
+    """
+    codec = _codecs.get(name)
+    if codec is None or codec.template is not get_template(name):
+        codec = _codecs[name] = SeatCodec(get_template(name))
+    return codec
+
+
+def speed_check(count=1000000, seed=723):
+    """
+    Times parse_many and validate_many on count seat IDs of the standard layout,
+    one in ten of them invalid, then format_many on the pairs of the valid ones,
+    and prints the time taken by each. The formatted IDs must match the parsed ones.
+    """
+    codec = get_codec("standard")
+    rnd = random.Random(seed)
+    seat_ids = [rnd.choice(codec.seat_ids) if rnd.random() < 0.9 else f"{rnd.randint(81, 99)}A"
+                for _ in range(count)]
+    for name, bulk in (("parse_many", codec.parse_many), ("validate_many", codec.validate_many)):
+        started = time.perf_counter()
+        results = bulk(seat_ids)
+        seconds = time.perf_counter() - started
+        print(f"{name}: {count} seat IDs in {seconds * 1000:.1f} ms, "
+              f"{sum(map(bool, results))} valid")
+    # The pairs of the valid IDs must format back to the same IDs
+    pairs = [pair for pair in codec.parse_many(seat_ids) if pair is not None]
+    started = time.perf_counter()
+    formatted = codec.format_many(pairs)
+    seconds = time.perf_counter() - started
+    same = formatted == [seat_id for seat_id in seat_ids if codec.is_valid(seat_id)]
+    print(f"format_many: {len(pairs)} pairs in {seconds * 1000:.1f} ms, "
+          f"{'same seat IDs' if same else 'SEAT IDS DIFFER'}")
+
+
+if __name__ == "__main__":
+    speed_check(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,429 @@
+# FC723 Project – Seat Booking Application
+
+# Compact seat map used by the seat booking applications.
+
+# Instead of a dictionary with one string key and one string value per seat, the seat map keeps
+# a single byte per seat in a bytearray indexed by (row, column). Booking references are kept in
+# a side table that only holds entries for booked seats.
+
+# Every row also has a version counter. Readers never take a lock; writers change seats under a
+# short row lock and bump the row's version, so a multi-seat change such as a modified booking can
+# be committed atomically with compare-and-swap on the versions of the rows it read.
+
+# The seat map also keeps running counts of free and booked seats (in total, per row and per seat
+# class), updated on every change, so occupancy statistics never have to look at the seats.
+
+# Seat states form a small state machine: the booking functions ask for an action (book, free,
+# hold, release) and TRANSITIONS decides, from the state code alone, whether it is allowed and
+# which state the seat moves to. A seat booked with a reference and a seat booked without one
+# (task 4 and task 5, shown as 'A') are both in the BOOKED state. The only way around the table
+# is replay(), used to restore saved seats when a seat map is recovered.
+#
+#     python seat_map.py [threads] [moves]     check compare-and-swap under concurrent writers
+
+import random
+import sys
+import threading
+from array import array
+from collections.abc import MutableMapping
+from enum import IntEnum
+
+
+class SeatState(IntEnum):
+    """
+    Status code stored for each seat.
+    """
+    FREE = 0
+    AISLE = 1
+    STORAGE = 2
+    BOOKED = 3
+    HELD = 4
+
+
+# The states as plain integers, compared in the inner loops
+FREE = SeatState.FREE.value
+AISLE = SeatState.AISLE.value
+STORAGE = SeatState.STORAGE.value
+BOOKED = SeatState.BOOKED.value
+HELD = SeatState.HELD.value
+
+# Value reported for a booked seat that has no booking reference
+BOOKED_MARKER = 'A'
+
+# Seating value of every status code (booked seats report their reference instead), and the reverse lookup
+STATUS_VALUES = ('F', 'X', 'S', BOOKED_MARKER, 'H')
+STATUS_CODES = {'F': FREE, 'X': AISLE, 'S': STORAGE, 'H': HELD}
+
+# Seat actions and the state they move a seat to from each state they are allowed in.
+# Modifying a booking is "free" on the old seat and "book" on the new one, applied together.
+_ALLOWED_ACTIONS = {
+    "book": {FREE: BOOKED},
+    "free": {BOOKED: FREE},
+    "hold": {FREE: HELD},
+    "release": {HELD: FREE},
+}
+# The same table indexed by state code: TRANSITIONS[action][state] is the new state, or None
+TRANSITIONS = {action: tuple(moves.get(state) for state in SeatState)
+               for action, moves in _ALLOWED_ACTIONS.items()}
+
+# Seat classes by position in the row: next to the window, next to the aisle, or in between
+SEAT_CLASSES = ('window', 'aisle', 'middle')
+
+# Row locks are striped: all seat maps share this fixed pool instead of holding one lock per row
+ROW_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+
+class SeatMap(MutableMapping):
+    """
+    A seating chart that stores one status byte per seat.
+    It reads like the seating dictionary it replaces: seating["12A"] returns 'F', 'X', 'S', 'H'
+    or the booking reference. Seats are changed with apply(), never by assigning a value.
+    """
+
+    __slots__ = ('template', '_status', '_refs', '_index', '_width', '_versions', '_watchers',
+                 '_counts', '_row_free', '_counts_lock', 'charts', 'free_runs', 'availability')
+
+    def __init__(self, template):
+        # The layout template supplies the seat lookup and the initial state of every seat
+        self.template = template
+        self._index = template.index
+        self._status = bytearray(template.buffer)
+        # Booking references for booked seats, keyed by position in the status array
+        self._refs = {}
+        self._width = len(template.columns)
+        # Version of every row: odd while a writer is changing the row, bumped by 2 per change
+        self._versions = array('L', bytes(array('L').itemsize * template.rows))
+        # Occupancy counters: free and booked seats in total, then free and booked seats per seat class
+        self._counts = array('l', (sum(template.row_free), 0,
+                                   *template.class_free, *[0] * len(SEAT_CLASSES)))
+        self._row_free = array('H', template.row_free)
+        self._counts_lock = threading.Lock()
+        # Callbacks told about every change, e.g. chart renderers that cache rendered rows
+        self._watchers = ()
+        # Chart renderers attached to this seat map, by style (see seat_chart.py)
+        self.charts = None
+        # Free run index used for group bookings (see group_booking.py)
+        self.free_runs = None
+        # Availability caches watching this seat map (see availability_cache.py)
+        self.availability = ()
+
+    @property
+    def rows(self):
+        return self.template.rows
+
+    @property
+    def columns(self):
+        return self.template.columns
+
+    def __getitem__(self, seat_id):
+        i = self._index[seat_id]
+        code = self._status[i]
+        if code == BOOKED:
+            return self._refs.get(i, BOOKED_MARKER)
+        return STATUS_VALUES[code]
+
+    def __setitem__(self, seat_id, value):
+        raise TypeError("Seats are changed with apply(), or replay() when recovering a seat map.")
+
+    def _store(self, i, value):
+        code = STATUS_CODES.get(value, BOOKED)
+        old = self._status[i]
+        if old != code:
+            self._count(i, old, code)
+        if code == BOOKED and value != BOOKED_MARKER:
+            # Store the reference before the status so a reader never sees a booked seat without it
+            self._refs[i] = value
+            self._status[i] = code
+        else:
+            self._status[i] = code
+            self._refs.pop(i, None)
+
+    def _count(self, i, old, new):
+        row, col = divmod(i, self._width)
+        k = self.template.column_classes[col]
+        if k is None:
+            return
+        counts = self._counts
+        booked_by_class = 2 + len(SEAT_CLASSES)
+        # Writers to different rows hold different row locks, so the shared counters need their own lock
+        with self._counts_lock:
+            if old == FREE:
+                counts[0] -= 1
+                counts[2 + k] -= 1
+                self._row_free[row] -= 1
+            elif old == BOOKED:
+                counts[1] -= 1
+                counts[booked_by_class + k] -= 1
+            if new == FREE:
+                counts[0] += 1
+                counts[2 + k] += 1
+                self._row_free[row] += 1
+            elif new == BOOKED:
+                counts[1] += 1
+                counts[booked_by_class + k] += 1
+
+    def _recount(self):
+        counts = self._counts
+        for n in range(len(counts)):
+            counts[n] = 0
+        for row in range(len(self._row_free)):
+            self._row_free[row] = 0
+        for i, code in enumerate(self._status):
+            self._count(i, None, code)
+
+    def _lock(self, row):
+        return ROW_LOCKS[hash((id(self), row)) % len(ROW_LOCKS)]
+
+    def row_versions(self, seat_ids):
+        """
+        Returns the current version of the rows holding the given seats, as {row: version}.
+        Pass the result to apply() to make sure none of those rows changed in the meantime.
+        """
+        width = self._width
+        versions = {}
+        for seat_id in seat_ids:
+            row = self._index[seat_id] // width
+            versions[row] = self._versions[row]
+        return versions
+
+    def snapshot(self, seat_ids):
+        """
+        Reads several seats as one consistent view without taking any lock.
+        If a writer changes one of the rows while it is being read, the read is simply repeated.
+        """
+        while True:
+            versions = self.row_versions(seat_ids)
+            if any(version % 2 for version in versions.values()):
+                continue
+            values = {seat_id: self[seat_id] for seat_id in seat_ids}
+            if self.row_versions(seat_ids) == versions:
+                return values
+
+    def replay(self, changes):
+        """
+        Sets seats to the given values ({seat_id: value}) atomically, whatever state they are in.
+        Only for recovery, when a seat map is rebuilt from a snapshot, the journal or the change log;
+        booking changes go through apply(), which only allows the moves in TRANSITIONS.
+        """
+        positions = [self._index[seat_id] for seat_id in changes]
+        return self._write(positions, set(), lambda: changes.values())
+
+    def apply(self, actions, refs=None, versions=None):
+        """
+        Applies seat actions ({seat_id: action}, see TRANSITIONS) atomically.
+        Every seat must be in a state its action is allowed from and every row in versions
+        (from row_versions()) must be unchanged; otherwise nothing is changed and False is returned.
+        A seat that becomes booked gets its reference from refs, or BOOKED_MARKER if there is none.
+        """
+        positions = [self._index[seat_id] for seat_id in actions]
+        moves = [TRANSITIONS[action] for action in actions.values()]
+        refs = refs or {}
+
+        def values():
+            if versions and any(self._versions[row] != version for row, version in versions.items()):
+                return None
+            new_values = []
+            for seat_id, i, move in zip(actions, positions, moves):
+                state = move[self._status[i]]
+                if state is None:
+                    return None
+                if state == BOOKED:
+                    new_values.append(refs.get(seat_id, BOOKED_MARKER))
+                else:
+                    new_values.append(STATUS_VALUES[state])
+            return new_values
+        return self._write(positions, set(versions or ()), values)
+
+    def _write(self, positions, rows, values):
+        # Stores new values in the seats at positions, if values() (called with every row lock held)
+        # returns them rather than None. rows lists further rows to lock while values() checks them.
+        width = self._width
+        changed_rows = {i // width for i in positions}
+        # Take the row locks in a fixed order so two writers can never deadlock
+        locks = sorted({self._lock(row) for row in rows | changed_rows}, key=id)
+        for lock in locks:
+            lock.acquire()
+        try:
+            new_values = values()
+            if new_values is None:
+                return False
+            for row in changed_rows:
+                self._versions[row] += 1
+            for i, value in zip(positions, new_values):
+                self._store(i, value)
+            for row in changed_rows:
+                self._versions[row] += 1
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+        for watcher in self._watchers:
+            watcher(positions)
+        return True
+
+    def __delitem__(self, seat_id):
+        raise TypeError("Seats cannot be removed from a seat map.")
+
+    def __contains__(self, seat_id):
+        return seat_id in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._status)
+
+    def watch(self, callback):
+        """
+        Registers a callback that is called with the changed seat positions after every change.
+        """
+        self._watchers = self._watchers + (callback,)
+
+    def row_codes(self, row):
+        """
+        Returns the status codes of every column in a 1-based row.
+        """
+        width = len(self.columns)
+        return self._status[(row - 1) * width:row * width]
+
+    def codes(self):
+        """
+        Returns a copy of the status codes of every seat, row by row.
+        """
+        return bytes(self._status)
+
+    def state(self, seat_id):
+        """
+        Returns the state of a seat as an integer status code (see SeatState).
+        """
+        return self._status[self._index[seat_id]]
+
+    def status(self, row, col):
+        """
+        Returns the status code of the seat at a 1-based row and a 0-based column position.
+        """
+        return self._status[(row - 1) * len(self.columns) + col]
+
+    def occupancy(self):
+        """
+        Returns the number of free and booked seats, the load factor (booked / bookable seats)
+        and the free and booked seats per seat class, read from the counters alone.
+        """
+        with self._counts_lock:
+            counts = self._counts.tolist()
+        classes = len(SEAT_CLASSES)
+        free, booked = counts[0], counts[1]
+        return {
+            "free": free,
+            "booked": booked,
+            "load_factor": booked / (free + booked) if free + booked else 0.0,
+            "free_by_class": dict(zip(SEAT_CLASSES, counts[2:2 + classes])),
+            "booked_by_class": dict(zip(SEAT_CLASSES, counts[2 + classes:])),
+        }
+
+    def free_in_row(self, row):
+        """
+        Returns the number of free seats in a 1-based row.
+        """
+        return self._row_free[row - 1]
+
+    def dump(self):
+        """
+        Returns the state of the seat map as the raw status bytes and a dictionary of
+        booking references keyed by seat position, ready to be stored outside memory.
+        """
+        return bytes(self._status), dict(self._refs)
+
+    @classmethod
+    def restore(cls, template, status, refs):
+        """
+        Rebuilds a seat map from the status bytes and references returned by dump().
+        """
+        seat_map = cls(template)
+        seat_map._status[:] = status
+        seat_map._refs = {int(i): ref for i, ref in refs.items()}
+        seat_map._recount()
+        return seat_map
+
+
+def concurrency_check(threads=8, moves=2000, seed=723):
+    """
+    Checks the row-version compare-and-swap of apply() and prints the outcome.
+    A commit made with a stale row version must change nothing. Then threads move their bookings
+    between the seats of the same three rows, each move freeing one seat and booking another
+    and retried when a row changed first (as modify_booking in task 1B does), while a reader
+    takes snapshots without locking. Every snapshot must show each booking on exactly one seat,
+    and the counters must match the seats at the end. Returns True if every check passed.
+    """
+    from layouts import get_template
+
+    seating = SeatMap(get_template("standard"))
+    versions = seating.row_versions(("1A",))
+    seating.apply({"1B": "book"})
+    stale_rejected = not seating.apply({"1C": "book"}, versions=versions) and seating["1C"] == 'F'
+    seating.apply({"1B": "free"})
+
+    seats = [seat_id for seat_id in seating.template.seat_ids[:3 * seating._width]
+             if seating.state(seat_id) == FREE]
+    refs = [f"MOVE{n:04d}" for n in range(threads)]
+    seating.apply({seat_id: "book" for seat_id in seats[:threads]}, dict(zip(seats, refs)))
+    retries = [0] * threads
+    errors = []
+    snapshots = [0]
+    done = threading.Event()
+
+    def mover(n):
+        rnd = random.Random(seed + n)
+        seat_id = seats[n]
+        for _ in range(moves):
+            while True:
+                new_seat = rnd.choice(seats)
+                versions = seating.row_versions((seat_id, new_seat))
+                if seating.state(new_seat) != FREE:
+                    continue
+                if seating[seat_id] != refs[n]:
+                    errors.append(f"{refs[n]} lost from {seat_id}")
+                    return
+                if seating.apply({seat_id: "free", new_seat: "book"}, {new_seat: refs[n]}, versions):
+                    seat_id = new_seat
+                    break
+                retries[n] += 1
+
+    def reader():
+        while not done.is_set():
+            booked = sorted(value for value in seating.snapshot(seats).values() if value != 'F')
+            if booked != refs:
+                errors.append(f"Snapshot shows {len(booked)} bookings instead of {threads}")
+                return
+            snapshots[0] += 1
+
+    # Switch threads as often as possible so writers really interleave
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        workers = [threading.Thread(target=mover, args=(n,)) for n in range(threads)]
+        watcher = threading.Thread(target=reader)
+        watcher.start()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        done.set()
+        watcher.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    counted = seating.occupancy()
+    seating._recount()
+    counters_match = counted == seating.occupancy() and counted["booked"] == threads
+    passed = stale_rejected and counters_match and not errors
+    for error in errors[:5]:
+        print(error)
+    print(f"CAS with a stale row version: {'rejected' if stale_rejected else 'COMMITTED'}")
+    print(f"{threads} threads, {threads * moves} moves, {sum(retries)} retries, "
+          f"{snapshots[0]} snapshots: "
+          f"{'every booking on one seat, counters match' if passed else 'CHECK FAILED'}")
+    return passed
+
+
+if __name__ == "__main__":
+    sys.exit(0 if concurrency_check(*[int(arg) for arg in sys.argv[1:3]]) else 1)
@@ -0,0 +1,166 @@
+# FC723 Project – Seat Booking Application
+
+# Multi-process sharded booking engine.
+
+# Flights are split across a pool of worker processes (shards), each with its own FlightInventory
+# and its own copy of the booking functions, so bookings for different flights run on different
+# CPU cores instead of sharing one Python interpreter. The router sends every request to the shard
+# that owns its flight, chosen from the CRC-32 of the flight ID, so all changes to one flight are
+# made by one process in the order they were sent.
+#
+# Booking references stay unique across shards: all shards share one secret key and every shard
+# draws its references from its own slice of the counter of a ReferenceSequence (see booking_refs.py),
+# so two shards can never produce the same reference.
+#
+#     python sharding.py [requests] [workers]     measure throughput for 1, 2, ... workers
+
+import multiprocessing
+import sys
+import time
+import zlib
+
+from booking_refs import ReferenceSequence, reference_key
+from inventory import FlightInventory
+from seat_codec import get_codec
+from task_loader import load_task
+
+
+def shard_for(flight_id, shards):
+    """
+    Returns the shard number that owns a flight.
+    """
+    return zlib.crc32(str(flight_id).encode()) % shards
+
+
+def _apply(commands, inventory, layout, flight_id, op, args):
+    if op not in commands:
+        return {"error": f"Unknown command: {op}"}
+    try:
+        if flight_id not in inventory:
+            inventory.add_flight(flight_id, layout)
+        return {"result": commands[op](inventory.cabin(flight_id), *args)}
+    except (ValueError, KeyError, TypeError) as error:
+        return {"error": str(error)}
+
+
+def _worker(shard, shards, key, task_file, layout, conn):
+    # Each worker loads its own copy of the task script, with its own reference registry
+    task = load_task(task_file)
+    task.reference_registry.sequence = ReferenceSequence(key, shard, shards)
+    commands = task.BATCH_COMMANDS
+    inventory = FlightInventory(":memory:")
+    while True:
+        batch = conn.recv()
+        if batch is None:
+            break
+        conn.send([_apply(commands, inventory, layout, flight_id, op, args)
+                   for flight_id, op, args in batch])
+    inventory.close()
+    conn.close()
+
+
+class ShardedEngine:
+    """
+    Routes booking requests to a pool of worker processes by flight.
+    Requests are (flight_id, operation, args) tuples using the batch commands of task_file
+    (check, book, free, modify, ...). Results come back as {"result": message} or
+    {"error": message}, in the order of the requests.
+    """
+
+    def __init__(self, workers=None, task_file="task 1B.py", layout="standard"):
+        self.shards = workers or multiprocessing.cpu_count()
+        key = reference_key()
+        self._connections = []
+        self._processes = []
+        for shard in range(self.shards):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker, daemon=True,
+                                              args=(shard, self.shards, key, task_file, layout, child))
+            process.start()
+            child.close()
+            self._connections.append(parent)
+            self._processes.append(process)
+
+    def execute_many(self, requests):
+        """
+        Applies many requests and returns their results in order.
+        Every shard receives its part of the requests as one batch,
+        and all shards work at the same time.
+        """
+        batches = [[] for _ in range(self.shards)]
+        positions = [[] for _ in range(self.shards)]
+        for position, (flight_id, op, args) in enumerate(requests):
+            shard = shard_for(flight_id, self.shards)
+            batches[shard].append((str(flight_id), op, [str(arg).upper() for arg in args]))
+            positions[shard].append(position)
+        for conn, batch in zip(self._connections, batches):
+            if batch:
+                conn.send(batch)
+        results = [None] * len(requests)
+        for conn, batch, shard_positions in zip(self._connections, batches, positions):
+            if batch:
+                for position, result in zip(shard_positions, conn.recv()):
+                    results[position] = result
+        return results
+
+    def execute(self, flight_id, op, *args):
+        """
+        Applies one request and returns its result.
+        """
+        return self.execute_many([(flight_id, op, args)])[0]
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        for conn in self._connections:
+            conn.send(None)
+        for process in self._processes:
+            process.join()
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def throughput_check(requests=200000, max_workers=None, flights=200, batch_size=5000):
+    """
+    Books and frees seats on many flights with 1, 2, 4, ... workers and prints the throughput.
+    Also checks that no booking reference was handed out twice.
+    """
+    max_workers = max_workers or multiprocessing.cpu_count()
+    codec = get_codec("standard")
+    seats = [seat for seat in codec.seat_ids if codec.is_bookable(seat)]
+    workload = []
+    for n in range(requests):
+        # Every flight books a seat in one round and frees it again in the next
+        round_number = n // flights
+        op = "book" if round_number % 2 == 0 else "free"
+        workload.append((f"AA{n % flights}", op, [seats[(round_number // 2) % len(seats)]]))
+    workers = 1
+    while True:
+        with ShardedEngine(workers) as engine:
+            started = time.perf_counter()
+            refs = []
+            for start in range(0, requests, batch_size):
+                for response in engine.execute_many(workload[start:start + batch_size]):
+                    result = response.get("result", "")
+                    if "reference" in result:
+                        refs.append(result.rsplit(" ", 1)[-1].rstrip("."))
+            elapsed = time.perf_counter() - started
+        unique = "unique" if len(refs) == len(set(refs)) else "DUPLICATE REFERENCES"
+        print(f"{workers} workers: {requests / elapsed:,.0f} requests/sec, {len(refs)} references, {unique}")
+        if workers >= max_workers:
+            break
+        workers = min(workers * 2, max_workers)
+
+
+if __name__ == "__main__":
+    throughput_check(int(sys.argv[1]) if len(sys.argv) > 1 else 200000,
+                     int(sys.argv[2]) if len(sys.argv) > 2 else None)
@@ -0,0 +1,100 @@
+# FC723 Project – Seat Booking Application
+
+# Binary snapshots of a seat map.
+
+# A snapshot holds the status byte of every seat and the booking reference of every booked seat,
+# together with the number of the last database change it includes. At startup the snapshot is
+# memory-mapped and copied into a new seat map in one go, and only the bookings changed after
+# it are read from SQLite, instead of loading every booking row by row.
+#
+# File layout (all numbers little-endian):
+#     header      magic "FC723SNP", format version (u16), last change number (u64),
+#                 rows (u32), columns (u32), number of references (u32), layout name length (u16)
+#     layout name UTF-8
+#     status      rows * columns status bytes
+#     references  per booked seat: position (u32), reference length (u8), reference (ASCII)
+
+import mmap
+import os
+import struct
+
+from seat_map import STATUS_VALUES, SeatMap
+
+SNAPSHOT_MAGIC = b"FC723SNP"
+SNAPSHOT_VERSION = 1
+
+HEADER = struct.Struct("<8sHQIIIH")
+REFERENCE = struct.Struct("<IB")
+
+
+def write_snapshot(path, seat_map, seq):
+    """
+    Writes a snapshot of a seat map that includes every database change up to seq.
+    The file is written next to the old one and renamed over it, so a crash while
+    writing never leaves a half-written snapshot behind.
+    """
+    status, refs = seat_map.dump()
+    name = seat_map.template.name.encode()
+    parts = [HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, seq, seat_map.rows, len(seat_map.columns),
+                         len(refs), len(name)), name, status]
+    for i, ref in refs.items():
+        encoded = ref.encode("ascii")
+        parts.append(REFERENCE.pack(i, len(encoded)))
+        parts.append(encoded)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as snapshot_file:
+        snapshot_file.write(b"".join(parts))
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temp_path, path)
+
+
+def load_snapshot(path, template):
+    """
+    Loads a snapshot written by write_snapshot() for the given layout template.
+    Returns (seat map, last change number), or None if there is no usable snapshot
+    (missing file, unknown format, a different layout, or a file that was cut short or damaged).
+    """
+    try:
+        snapshot_file = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with snapshot_file:
+        try:
+            data = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            return None
+        with data:
+            if len(data) < HEADER.size:
+                return None
+            magic, version, seq, rows, columns, count, name_length = HEADER.unpack_from(data)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                return None
+            offset = HEADER.size
+            name = data[offset:offset + name_length]
+            offset += name_length
+            if (name != template.name.encode() or rows != template.rows
+                    or columns != len(template.columns)):
+                return None
+            size = rows * columns
+            status = data[offset:offset + size]
+            offset += size
+            # Every part must lie inside the file and hold known values, so a file cut short by
+            # a crash or damaged on disk is rejected rather than loaded in part
+            if len(status) != size or max(status, default=0) >= len(STATUS_VALUES):
+                return None
+            refs = {}
+            for _ in range(count):
+                if offset + REFERENCE.size > len(data):
+                    return None
+                i, length = REFERENCE.unpack_from(data, offset)
+                offset += REFERENCE.size
+                ref = data[offset:offset + length]
+                offset += length
+                if i >= size or len(ref) != length or not ref.isascii():
+                    return None
+                refs[i] = ref.decode("ascii")
+            if offset != len(data):
+                return None
+    return SeatMap.restore(template, status, refs), seq
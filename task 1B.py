@@ -6,21 +6,31 @@
 
 # The seating chart simulates a plane with 80 rows, an aisle inserted between seats C and D,
 
-import random
-import string
+import sys
 
+from batch import run_batch_file
+from booking_refs import ReferenceRegistry, ReferenceSequence
+from group_booking import allocate_group
+from journal import Journal
+from layouts import get_template
+from metrics import increment, instrument
+from seat_chart import write_chart
+from seat_map import SeatMap, FREE, AISLE, STORAGE, BOOKED, HELD
+
+# Registry of booking references currently in use, kept up to date on every booking change
+reference_registry = ReferenceRegistry(sequence=ReferenceSequence())
+
+# Append-only journal of seating changes, kept in the current folder
+JOURNAL_FILE = "task1B.journal"
+
+@instrument("generate_booking_reference")
 def generate_booking_reference(seating):
     """
     Generates a unique 8-character alphanumeric booking reference.
-    It checks all current seating values (ignoring "F", "X", and "S")
-    to ensure that the generated reference is unique.
+    Uniqueness is checked against the reference registry, which is updated
+    whenever a seat is booked, freed or modified, instead of scanning all seating values.
     """
-    # Collect all booking references currently used in seating
-    existing_refs = {value for value in seating.values() if value not in {"F", "X", "S"}}
-    while True:
-        ref = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        if ref not in existing_refs:
-            return ref
+    return reference_registry.generate()
 
 def initialize_seating():
     """
@@ -29,20 +39,9 @@ def initialize_seating():
     The aisle (fourth column) is permanently marked with "X" (non-bookable).
     For rows 79 and 80 in columns D, E, and F, the seats are designated as storage areas ("S").
     All other seat positions are initially free ('F').
+    The chart is a compact SeatMap copied from the prebuilt "standard" layout template.
     """
-    rows = range(1, 81)  # 80 rows
-    columns = ['A', 'B', 'C', 'aisle', 'D', 'E', 'F']
-    seating = {}
-    for row in rows:
-        for col in columns:
-            seat_id = f"{row}{col}"
-            if col == 'aisle':
-                seating[seat_id] = 'X'
-            elif row in (79, 80) and col in ('D', 'E', 'F'):
-                seating[seat_id] = 'S'
-            else:
-                seating[seat_id] = 'F'
-    return seating
+    return SeatMap(get_template("standard"))
 
 def check_availability(seating, seat_id):
     """
@@ -53,105 +52,193 @@ def check_availability(seating, seat_id):
     if seat_id not in seating:
         return f"Seat {seat_id} does not exist."
     
-    status = seating[seat_id]
-    if status == 'F':
+    state = seating.state(seat_id)
+    if state == FREE:
         return f"Seat {seat_id} is available for booking."
-    elif status == 'X':
+    elif state == AISLE:
         return f"Seat {seat_id} is an aisle and is not bookable."
-    elif status == 'S':
+    elif state == STORAGE:
         return f"Seat {seat_id} is a storage area and is not bookable."
+    elif state == HELD:
+        return f"Seat {seat_id} is on hold and is not bookable."
     else:
         # For booked seats, hide the actual booking reference.
         return f"Seat {seat_id} is already booked."
 
+@instrument("book_seat")
 def book_seat(seating, seat_id):
     """
-    Books a seat if it is available (status 'F').
+    Books a seat if it is available (state FREE).
     Generates a unique booking reference and updates the seat.
     The booking confirmation message shows the generated reference.
     """
     if seat_id not in seating:
         return f"Seat {seat_id} does not exist."
     
-    if seating[seat_id] == 'F':
+    state = seating.state(seat_id)
+    if state == FREE:
         ref = generate_booking_reference(seating)
-        seating[seat_id] = ref  # Store the booking reference
-        return f"Seat {seat_id} has been successfully booked with reference {ref}."
-    elif seating[seat_id] == 'X':
+        # Store the booking reference only if no other writer booked the seat in the meantime
+        if seating.apply({seat_id: "book"}, {seat_id: ref}):
+            return f"Seat {seat_id} has been successfully booked with reference {ref}."
+        reference_registry.release(ref)
+        return f"Seat {seat_id} is already booked."
+    elif state == AISLE:
         return f"Seat {seat_id} is an aisle and cannot be booked."
-    elif seating[seat_id] == 'S':
+    elif state == STORAGE:
         return f"Seat {seat_id} is a storage area and cannot be booked."
+    elif state == HELD:
+        return f"Seat {seat_id} is on hold and cannot be booked."
     else:
         return f"Seat {seat_id} is already booked."
 
+@instrument("free_seat")
 def free_seat(seating, seat_id):
     """
-    Frees a booked seat (i.e., a seat that is not 'F', 'X', or 'S'),
-    marking it as available ('F').
+    Frees a booked seat (state BOOKED), marking it as available ('F').
+    The seat is only freed if its row is unchanged since its state and booking reference were read;
+    if another writer changed the row first, the checks are repeated.
     """
     if seat_id not in seating:
         return f"Seat {seat_id} does not exist."
     
-    if seating[seat_id] == 'X':
-        return f"Seat {seat_id} is an aisle and cannot be freed."
-    if seating[seat_id] == 'S':
-        return f"Seat {seat_id} is a storage area and cannot be freed."
-    if seating[seat_id] == 'F':
-        return f"Seat {seat_id} is already free."
-    
-    seating[seat_id] = 'F'
+    while True:
+        versions = seating.row_versions((seat_id,))
+        state = seating.state(seat_id)
+        if state == AISLE:
+            return f"Seat {seat_id} is an aisle and cannot be freed."
+        if state == STORAGE:
+            return f"Seat {seat_id} is a storage area and cannot be freed."
+        if state == FREE:
+            return f"Seat {seat_id} is already free."
+        if state == HELD:
+            return f"Seat {seat_id} is on hold; release it instead."
+        
+        ref = seating[seat_id]
+        if seating.apply({seat_id: "free"}, versions=versions):
+            break
+        # Another writer changed the row first; check again
+        increment("free_retries")
+    reference_registry.release(ref)
     return f"Seat {seat_id} has been freed and is now available."
 
+@instrument("modify_booking")
 def modify_booking(seating, current_seat, new_seat):
     """
     Modifies a booking by changing from current_seat to new_seat.
     Checks that current_seat is booked and new_seat is available.
     If conditions are met, frees the current seat and books the new seat with a new booking reference.
+    Both seats change in one atomic commit; if another writer changes either row first,
+    the checks are repeated.
     """
     if current_seat not in seating or new_seat not in seating:
         return "One or both seat IDs do not exist."
     
-    if seating[current_seat] == 'F':
-        return f"Current seat {current_seat} is not booked."
-    
-    if seating[new_seat] != 'F':
-        return f"New seat {new_seat} is not available for booking."
+    while True:
+        versions = seating.row_versions((current_seat, new_seat))
+        if seating.state(current_seat) != BOOKED:
+            return f"Current seat {current_seat} is not booked."
+        
+        if seating.state(new_seat) != FREE:
+            return f"New seat {new_seat} is not available for booking."
+        
+        old_ref = seating[current_seat]
+        ref = generate_booking_reference(seating)
+        if seating.apply({current_seat: "free", new_seat: "book"}, {new_seat: ref}, versions):
+            reference_registry.release(old_ref)
+            return f"Booking modified: changed from {current_seat} to {new_seat} with new reference {ref}."
+        reference_registry.release(ref)
+        # Another writer changed one of the rows first; check again
+        increment("modify_retries")
+
+@instrument("book_group")
+def book_group(seating, size):
+    """
+    Books seats next to each other for a group of passengers under one booking reference.
+    The smallest free block on one side of the aisle that fits the group is chosen;
+    if there is none, the group is seated across the aisle.
+    All seats are booked together, so either every seat is booked or none is.
+    """
+    try:
+        size = int(size)
+    except ValueError:
+        return "Group size must be a number."
+    if size < 1:
+        return "Group size must be at least 1."
     
-    seating[current_seat] = 'F'
-    ref = generate_booking_reference(seating)
-    seating[new_seat] = ref
-    return f"Booking modified: changed from {current_seat} to {new_seat} with new reference {ref}."
+    ref, seats = allocate_group(seating, size, reference_registry)
+    if ref is None:
+        return f"There are no {size} seats available together."
+    if len(seats) == 1:
+        return f"Seat {seats[0]} has been successfully booked with reference {ref}."
+    return f"Seats {', '.join(seats)} have been successfully booked with reference {ref}."
+
+def hold_seat(seating, seat_id):
+    """
+    Puts a free seat on hold, so it cannot be booked until it is released.
+    """
+    if seat_id not in seating:
+        return f"Seat {seat_id} does not exist."
+    if seating.apply({seat_id: "hold"}):
+        return f"Seat {seat_id} is now on hold."
+    return f"Seat {seat_id} is not free and cannot be put on hold."
+
+def release_seat(seating, seat_id):
+    """
+    Releases a seat on hold, making it available again.
+    """
+    if seat_id not in seating:
+        return f"Seat {seat_id} does not exist."
+    if seating.apply({seat_id: "release"}):
+        return f"Seat {seat_id} has been released and is now available."
+    return f"Seat {seat_id} is not on hold."
+
+def show_occupancy(seating):
+    """
+    Returns a summary of free and booked seats and the load factor of the flight.
+    The numbers come from counters the seat map updates on every booking change,
+    so the seats themselves are not read.
+    """
+    stats = seating.occupancy()
+    free_by_class = ", ".join(f"{count} {seat_class}" for seat_class, count in stats["free_by_class"].items())
+    return (f"{stats['booked']} seats booked, {stats['free']} seats free ({free_by_class}), "
+            f"load factor {stats['load_factor']:.1%}.")
 
 def show_booking_status(seating):
     """
     Prints the current seating chart in a formatted way.
     The chart displays rows 1 to 80 with columns: A, B, C, (blank for aisle), D, E, F.
-    If a seat is booked (i.e. its value is not "F", "X", or "S"), it displays "A" instead of the full reference.
+    Booked seats are displayed as "A" instead of the full reference, and seats on hold as "H".
+    Rendered rows are cached and only rows changed since the last call are rendered again.
     """
-    columns = ['A', 'B', 'C', 'aisle', 'D', 'E', 'F']
-    header_columns = [col if col != 'aisle' else "" for col in columns]
-    
-    print("\nCurrent Booking Status:")
-    header = "    " + "   ".join(header_columns)
-    print(header)
-    for row in range(1, 81):
-        row_seats = []
-        for col in columns:
-            seat_id = f"{row}{col}"
-            cell = seating[seat_id]
-            # For any booked seat, display "A" in the seating chart.
-            if cell not in {"F", "X", "S"}:
-                cell = "A"
-            row_seats.append(cell)
-        print(f"{row:>3} " + "   ".join(row_seats))
-    print()  # Blank line for spacing
+    write_chart(seating, "status")
+
+# Commands accepted in batch mode, e.g. "book 2B", "modify 2B 3C" or "group 4"
+BATCH_COMMANDS = {
+    "check": check_availability,
+    "book": book_seat,
+    "free": free_seat,
+    "modify": modify_booking,
+    "group": book_group,
+    "hold": hold_seat,
+    "release": release_seat,
+    "occupancy": show_occupancy,
+}
 
 def main():
     """
     Main function to run the seat booking application with modify booking functionality.
     Displays a welcome message and a menu for user input.
     """
-    seating = initialize_seating()
+    # Bookings made in earlier runs are recovered from the journal, which then records every change
+    journal = Journal(JOURNAL_FILE)
+    seating = journal.recover(initialize_seating())
+    reference_registry.load_from_seating(seating)
+    # Batch mode: python <this file> --batch [commands file], reading standard input by default
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        run_batch_file(seating, BATCH_COMMANDS, sys.argv[2] if len(sys.argv) > 2 else "-", normalize=str.upper)
+        journal.close()
+        return
     print("Welcome to the Apache Airlines Seat Booking Application!")
     print("We are glad to have you here. Please follow the menu options below to manage your booking.\n\n")
     
@@ -162,9 +249,10 @@ def main():
         print("3. Free a seat")
         print("4. Show booking status")
         print("5. Modify booking")
-        print("6. Exit program")
+        print("6. Book seats for a group")
+        print("7. Exit program")
         
-        choice = input("Please enter your choice (1-6): ").strip()
+        choice = input("Please enter your choice (1-7): ").strip()
         
         if choice == '1':
             show_booking_status(seating)
@@ -183,10 +271,14 @@ def main():
             new_seat = input("Enter the new seat ID you want (e.g., 3A): ").strip().upper()
             print(modify_booking(seating, current_seat, new_seat))
         elif choice == '6':
+            size = input("Enter the number of passengers in the group: ").strip()
+            print(book_group(seating, size))
+        elif choice == '7':
+            journal.close()
             print("Thank you for using the Apache Airlines Seat Booking Application. Goodbye!")
             break
         else:
-            print("Invalid choice. Please select an option from 1 to 6.")
+            print("Invalid choice. Please select an option from 1 to 7.")
 
 if __name__ == "__main__":
     main()
@@ -4,142 +4,208 @@
 # It provides a menu for checking seat availability, booking a seat, freeing a seat, showing booking status, and exiting the program.
 # The seating chart simulates a plane with 80 rows, an aisle inserted between seats C and D,
 
-import random
-import string
-import re
-import sqlite3
+import sys
+
+from batch import run_batch_file
+from booking_refs import ReferenceRegistry, ReferenceSequence
+from booking_store import BookingStore, BATCHED, PASSPORT_PATTERN
+from layouts import get_template
+from metrics import instrument
+from seat_chart import write_chart
+from seat_codec import get_codec
+from seat_map import SeatMap, FREE, AISLE, STORAGE
+from snapshot import load_snapshot, write_snapshot
 
 # Global dictionary for in-memory passenger details (optional backup)
 passenger_details = {}
 
-# Connect to SQLite database (or create if it doesn't exist)
-conn = sqlite3.connect("bookings.db")
-cursor = conn.cursor()
-
-# Create bookings table
-cursor.execute('''
-    CREATE TABLE IF NOT EXISTS bookings (
-        booking_ref TEXT PRIMARY KEY,
-        first_name TEXT,
-        last_name TEXT,
-        passport TEXT,
-        seat TEXT
-    )
-''')
-conn.commit()
+# Registry of booking references in use, covering both the seating chart and the database
+reference_registry = ReferenceRegistry(sequence=ReferenceSequence())
 
+# SQLite bookings database. It is opened (and created if it doesn't exist) on first use,
+# not when this file is loaded. Each booking is committed as soon as it is made.
+store = BookingStore("bookings.db")
+
+# Binary snapshot of the seating chart, rewritten every SNAPSHOT_INTERVAL bookings and cancellations
+SNAPSHOT_FILE = "seating.snapshot"
+SNAPSHOT_INTERVAL = 1000
+changes_since_snapshot = 0
+
+# Seat IDs are validated against the layout of the seating chart
+seat_codec = get_codec("standard")
+SEAT_FORMAT_HELP = (f"Use row number (1-{seat_codec.template.rows}) followed by seat letter "
+                    f"{seat_codec.seat_ids[0][-1]}-{seat_codec.seat_ids[-1][-1]}.")
+
+@instrument("generate_booking_reference")
 def generate_booking_reference(seating):
-    existing_refs = {value for value in seating.values() if value not in {"F", "X", "S"}}
-    while True:
-        ref = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-        if ref not in existing_refs:
-            return ref
+    # Uniqueness is checked against the registry instead of scanning every seat
+    return reference_registry.generate()
 
 def initialize_seating():
-    seating = {}
-    rows = 80
-    seats = "ABCDEF"
-    storage_seats = {"79D", "79E", "79F", "80D", "80E", "80F"}
-    for row in range(1, rows + 1):
-        for seat in seats:
-            key = f"{row}{seat}"
-            seating[key] = "S" if key in storage_seats else "F"
-    return seating
+    # Compact seat map copied from the prebuilt "standard" layout template
+    return SeatMap(get_template("standard"))
 
 def load_seating_from_db(seating):
-    cursor.execute("SELECT booking_ref, seat FROM bookings")
-    for booking_ref, seat in cursor.fetchall():
-        seating[seat] = booking_ref
+    # A booking for a seat this chart does not have (e.g. added by another tool) is left in the
+    # database and only its reference is registered below
+    seating.replay({seat: booking_ref for booking_ref, seat in store.booked_seats() if seat in seating})
+    # Register every stored reference, including bookings for seats not in this chart
+    reference_registry.load_from_db(store.conn)
+
+def load_seating():
+    """
+    Returns the seating chart at startup.
+    The latest snapshot is memory-mapped and only the bookings and cancellations made after it
+    are replayed from the database. Without a usable snapshot every booking is loaded and a new
+    snapshot is written for the next start.
+    """
+    loaded = load_snapshot(SNAPSHOT_FILE, get_template("standard"))
+    # A snapshot newer than the database belongs to another database file
+    if loaded is None or loaded[1] > store.last_change():
+        seating = initialize_seating()
+        load_seating_from_db(seating)
+        save_snapshot(seating)
+        return seating
+    seating, seq = loaded
+    for seq, action, booking_ref, seat in store.changes_since(seq):
+        if seat in seating:
+            seating.replay({seat: booking_ref if action == "book" else "F"})
+    reference_registry.load_from_seating(seating)
+    # References of bookings for seats outside the chart are only in the database
+    reference_registry.load_from_db(store.conn)
+    return seating
+
+def save_snapshot(seating):
+    """
+    Writes a snapshot of the seating chart and drops the logged changes it covers.
+    """
+    global changes_since_snapshot
+    # Pending writes are committed first so the snapshot never holds bookings the database could lose
+    store.flush()
+    seq = store.last_change()
+    write_snapshot(SNAPSHOT_FILE, seating, seq)
+    store.trim_log(seq)
+    changes_since_snapshot = 0
+
+def record_change(seating):
+    # Counts bookings and cancellations and refreshes the snapshot every SNAPSHOT_INTERVAL changes
+    global changes_since_snapshot
+    changes_since_snapshot += 1
+    if changes_since_snapshot >= SNAPSHOT_INTERVAL:
+        save_snapshot(seating)
 
 def display_seating(seating):
-    # Updated: Show "R" for booked seats instead of booking reference
-    print("\nSeating Layout (F = Free, X = Aisle, S = Storage, R = Reserved)")
-    print("     A   B   C       D   E   F")
-    for row in range(1, 81):
-        row_display = []
-        for seat in "ABC":
-            val = seating[f"{row}{seat}"]
-            # if the seat is not free, storage or aisle, mark as "R"
-            row_display.append(val if val in {"F", "S"} else ("R" if val not in {"X", "F", "S"} else val))
-        row_display.append("X")
-        for seat in "DEF":
-            val = seating[f"{row}{seat}"]
-            row_display.append(val if val in {"F", "S"} else ("R" if val not in {"X", "F", "S"} else val))
-        row_str = str(row).rjust(2)
-        print(f"{row_str}   {'   '.join(row_display)}")
+    # Booked seats are shown as "R"; rows are cached and only changed rows are rendered again
+    write_chart(seating, "reserved")
 
 def valid_seat_format(seat):
-    return re.match(r"^([1-9][0-9]?|80)[A-F]$", seat) is not None
+    return seat_codec.is_valid(seat)
 
 def valid_passport_format(passport):
-    return re.match(r"^[A-Z0-9]{6,15}$", passport.upper()) is not None
+    return PASSPORT_PATTERN.fullmatch(passport) is not None
 
-def book_seat(seating):
-    first = input("Enter First Name: ").strip()
-    last = input("Enter Last Name: ").strip()
-    passport = input("Enter Passport Number: ").strip().upper()
+@instrument("book_seat")
+def reserve_seat(seating, first, last, passport, seat_choice):
+    """
+    Books a seat for a passenger without prompting and returns the outcome message.
+    Used by the menu and by batch mode.
+    """
+    passport = passport.strip().upper()
+    seat_choice = seat_choice.upper()
 
     if not valid_passport_format(passport):
-        print("Invalid passport number format. Use 6-15 letters/numbers.")
-        return
-
-    seat_choice = input("Enter seat to book (e.g., 12A): ").upper()
+        return "Invalid passport number format. Use 6-15 letters/numbers."
 
     if not valid_seat_format(seat_choice):
-        print("Invalid seat format. Use row number (1-80) followed by seat letter A-F.")
-        return
+        return "Invalid seat format. " + SEAT_FORMAT_HELP
 
-    if seating.get(seat_choice) in {"S", "X"}:
-        print("That seat cannot be booked.")
-        return
-    if seating.get(seat_choice) != "F":
-        print("That seat is already booked.")
-        return
+    state = seating.state(seat_choice)
+    if state == AISLE or state == STORAGE:
+        return "That seat cannot be booked."
+    if state != FREE:
+        return "That seat is already booked."
 
     booking_ref = generate_booking_reference(seating)
-    seating[seat_choice] = booking_ref
+    if not seating.apply({seat_choice: "book"}, {seat_choice: booking_ref}):
+        reference_registry.release(booking_ref)
+        return "That seat is already booked."
 
     # Store in the database
-    cursor.execute("INSERT INTO bookings VALUES (?, ?, ?, ?, ?)",
-                   (booking_ref, first, last, passport, seat_choice))
-    conn.commit()
+    store.add_booking(booking_ref, first, last, passport, seat_choice)
+    record_change(seating)
 
     # Booking confirmation displays the actual booking reference
-    print(f"Seat {seat_choice} successfully booked! Your booking reference is: {booking_ref}")
+    return f"Seat {seat_choice} successfully booked! Your booking reference is: {booking_ref}"
+
+def book_seat(seating):
+    first = input("Enter First Name: ").strip()
+    last = input("Enter Last Name: ").strip()
+    passport = input("Enter Passport Number: ").strip().upper()
+
+    if not valid_passport_format(passport):
+        print("Invalid passport number format. Use 6-15 letters/numbers.")
+        return
+
+    seat_choice = input("Enter seat to book (e.g., 12A): ").upper()
+    print(reserve_seat(seating, first, last, passport, seat_choice))
+
+@instrument("cancel_booking")
+def cancel_reference(seating, booking_ref):
+    """
+    Cancels the booking with the given reference and returns the outcome message.
+    """
+    seat = store.remove_booking(booking_ref.upper())
+    if seat is not None:
+        # A booking for a seat outside the chart was never loaded into it (see load_seating_from_db)
+        if seat in seating:
+            seating.apply({seat: "free"})
+        reference_registry.release(booking_ref.upper())
+        record_change(seating)
+        return f"Booking for seat {seat} has been canceled."
+    return "Booking reference not found."
 
 def cancel_booking(seating):
     booking_ref = input("Enter booking reference to cancel: ").upper()
-    cursor.execute("SELECT seat FROM bookings WHERE booking_ref = ?", (booking_ref,))
-    result = cursor.fetchone()
-    if result:
-        seat = result[0]
-        seating[seat] = "F"
-        cursor.execute("DELETE FROM bookings WHERE booking_ref = ?", (booking_ref,))
-        conn.commit()
-        print(f"Booking for seat {seat} has been canceled.")
-    else:
-        print("Booking reference not found.")
+    print(cancel_reference(seating, booking_ref))
+
+@instrument("lookup_booking")
+def lookup_booking(seating, *identifier):
+    """
+    Finds a booking by reference, passport number or full name and returns its details.
+    The identifier may be given as several words, e.g. a first and last name.
+    """
+    # Indexed lookup on booking reference, passport and full name
+    booking = store.find_booking(" ".join(identifier).strip().upper())
+    if booking:
+        ref, first, last, passport, seat = booking
+        return (f"\nBooking Details:\n"
+                f"Name: {first} {last}\n"
+                f"Passport: {passport}\n"
+                f"Seat: {seat}\n"
+                f"Booking Reference: {ref}")
+    return "No booking found with that information."
 
 def show_user_booking():
-    identifier = input("Enter your booking reference, passport number, or full name: ").strip().upper()
-    found = False
-    cursor.execute("SELECT * FROM bookings")
-    for ref, first, last, passport, seat in cursor.fetchall():
-        full_name = f"{first} {last}".upper()
-        if identifier in {ref, passport.upper(), full_name}:
-            print("\nBooking Details:")
-            print(f"Name: {first} {last}")
-            print(f"Passport: {passport}")
-            print(f"Seat: {seat}")
-            print(f"Booking Reference: {ref}")
-            found = True
-            break
-    if not found:
-        print("No booking found with that information.")
+    identifier = input("Enter your booking reference, passport number, or full name: ")
+    print(lookup_booking(None, identifier))
+
+# Commands accepted in batch mode, e.g. "book Jane Doe AB123456 12A", "cancel AB12CD34" or "lookup Jane Doe"
+BATCH_COMMANDS = {
+    "book": reserve_seat,
+    "cancel": cancel_reference,
+    "lookup": lookup_booking,
+}
 
 def menu():
-    seating = initialize_seating()
-    load_seating_from_db(seating)
+    seating = load_seating()
+    # Batch mode: python "task 2B final.py" --batch [commands file], reading standard input by default
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        # Commit bookings in groups rather than one at a time while replaying commands
+        store.set_mode(BATCHED)
+        run_batch_file(seating, BATCH_COMMANDS, sys.argv[2] if len(sys.argv) > 2 else "-")
+        save_snapshot(seating)
+        store.close()
+        return
     print("\nWelcome to the Apache Airlines Seat Booking Application!,  We are glad to have you here. Please follow the menu options below to manage your booking")
     while True:
         print("\nMenu:")
@@ -159,6 +225,8 @@ def menu():
         elif choice == "4":
             display_seating(seating)
         elif choice == "5":
+            save_snapshot(seating)
+            store.close()
             print("Thank you for using Apache Airlines. Goodbye!")
             break
         else:
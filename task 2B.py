@@ -9,9 +9,30 @@ import random
 import string
 import re
 
+from layouts import get_template
+from seat_chart import write_chart
+from seat_codec import get_codec
+from seat_map import SeatMap, FREE, STORAGE
+
 # Global dictionary to store passenger details
 passenger_details = {}
 
+# Secondary indexes over passenger_details: passport number / upper-cased full name -> booking references
+passport_index = {}
+name_index = {}
+
+def index_passenger(booking_ref, details):
+    passport_index.setdefault(details['passport'].upper(), []).append(booking_ref)
+    name_index.setdefault(f"{details['first_name']} {details['last_name']}".upper(), []).append(booking_ref)
+
+def unindex_passenger(booking_ref, details):
+    for index, key in ((passport_index, details['passport'].upper()),
+                       (name_index, f"{details['first_name']} {details['last_name']}".upper())):
+        refs = index[key]
+        refs.remove(booking_ref)
+        if not refs:
+            del index[key]
+
 def generate_booking_reference(seating):
     existing_refs = {value for value in seating.values() if value not in {"F", "X", "S"}}
     while True:
@@ -20,47 +41,16 @@ def generate_booking_reference(seating):
             return ref
 
 def initialize_seating():
-    seating = {}
-    rows = 80
-    seats = "ABCDEF"
-    storage_seats = {"79D", "79E", "79F", "80D", "80E", "80F"}
-    for row in range(1, rows + 1):
-        for seat in seats:
-            key = f"{row}{seat}"
-            seating[key] = "S" if key in storage_seats else "F"
-    return seating
+    # Compact seat map copied from the prebuilt "standard" layout template
+    return SeatMap(get_template("standard"))
 
 def display_seating(seating):
-    print("\nSeating Layout (F = Free, A = Assigned, X = Aisle)")
-    # Updated header to include the aisle indicator "X" between columns C and D
-    print("     A   B   C       D   E   F")
-    for row in range(1, 81):
-        row_display = []
-        # Process seats A, B, C
-        for seat in "ABC":
-            key = f"{row}{seat}"
-            if seating[key] == "S":
-                row_display.append("S")
-            elif seating[key] == "F":
-                row_display.append("F")
-            else:
-                row_display.append("A")
-        # Add aisle indicator between columns C and D
-        row_display.append("X")
-        # Process seats D, E, F
-        for seat in "DEF":
-            key = f"{row}{seat}"
-            if seating[key] == "S":
-                row_display.append("S")
-            elif seating[key] == "F":
-                row_display.append("F")
-            else:
-                row_display.append("A")
-        row_str = str(row).rjust(2)
-        print(f"{row_str}   {'   '.join(row_display)}")
+    # Booked seats are shown as "A"; rows are cached and only changed rows are rendered again
+    write_chart(seating, "assigned")
 
 def valid_seat_format(seat):
-    return re.match(r"^([1-9][0-9]?|80)[A-F]$", seat) is not None
+    # Checked against the seat IDs of the layout instead of a pattern for 80 rows of A-F
+    return get_codec("standard").is_valid(seat)
 
 def valid_passport_format(passport):
     return re.match(r"^[A-Z0-9]{6,15}$", passport.upper()) is not None
@@ -83,18 +73,20 @@ def book_seat(seating):
     if seat_choice not in seating:
         print("That seat does not exist.")
         return
-    if seating[seat_choice] == "S":
+    state = seating.state(seat_choice)
+    if state == STORAGE:
         print("That seat is reserved for storage and cannot be booked.")
         return
-    if seating[seat_choice] == "F":
+    if state == FREE:
         booking_ref = generate_booking_reference(seating)
-        seating[seat_choice] = booking_ref
+        seating.apply({seat_choice: "book"}, {seat_choice: booking_ref})
         passenger_details[booking_ref] = {
             "first_name": first,
             "last_name": last,
             "passport": passport,
             "seat": seat_choice
         }
+        index_passenger(booking_ref, passenger_details[booking_ref])
         print(f"Seat {seat_choice} successfully booked! Your booking reference is: {booking_ref}")
     else:
         print("That seat is already booked or invalid.")
@@ -103,30 +95,28 @@ def cancel_booking(seating):
     booking_ref = input("Enter booking reference to cancel: ").upper()
     if booking_ref in passenger_details:
         seat = passenger_details[booking_ref]['seat']
-        seating[seat] = "F"
-        del passenger_details[booking_ref]
+        seating.apply({seat: "free"})
+        unindex_passenger(booking_ref, passenger_details.pop(booking_ref))
         print(f"Booking for seat {seat} has been canceled.")
     else:
         print("Booking reference not found.")
 
 def show_user_booking():
     identifier = input("Enter your booking reference, passport number, or full name: ").strip().upper()
-    found = False
-    for ref, details in passenger_details.items():
-        first = details['first_name']
-        last = details['last_name']
-        full_name = f"{first} {last}".upper()
-        if (ref == identifier or 
-            details['passport'].upper() == identifier or 
-            full_name == identifier):
-            print("\nBooking Details:")
-            print(f"Name: {details['first_name']} {details['last_name']}")
-            print(f"Passport: {details['passport']}")
-            print(f"Seat: {details['seat']}")
-            print(f"Booking Reference: {ref}")
-            found = True
-            break
-    if not found:
+    # Look up by booking reference first, then through the passport and name indexes
+    ref = identifier if identifier in passenger_details else None
+    if ref is None:
+        refs = passport_index.get(identifier) or name_index.get(identifier)
+        if refs:
+            ref = refs[0]
+    if ref is not None:
+        details = passenger_details[ref]
+        print("\nBooking Details:")
+        print(f"Name: {details['first_name']} {details['last_name']}")
+        print(f"Passport: {details['passport']}")
+        print(f"Seat: {details['seat']}")
+        print(f"Booking Reference: {ref}")
+    else:
         print("No booking found with that information.")
 
 def menu():
@@ -6,6 +6,18 @@
 
 # The seating chart simulates a plane with 80 rows, an aisle inserted between seats C and D.
 
+import sys
+
+from batch import run_batch_file
+from journal import Journal
+from layouts import get_template
+from metrics import instrument
+from seat_chart import write_chart
+from seat_map import SeatMap, FREE, AISLE, STORAGE, BOOKED, HELD
+
+
+# Append-only journal of seating changes, kept in the current folder
+JOURNAL_FILE = "task5.journal"
 
 def initialize_seating():
     """
@@ -14,20 +26,9 @@ def initialize_seating():
     The aisle (fourth column) is permanently marked with "X" (non-bookable).
     For rows 79 and 80 in columns D, E, and F, the seats are designated as storage areas ("S").
     All other seat positions are initially free ('F').
+    The chart is a compact SeatMap copied from the prebuilt "standard" layout template.
     """
-    rows = range(1, 81)  # 80 rows
-    columns = ['A', 'B', 'C', 'aisle', 'D', 'E', 'F']
-    seating = {}
-    for row in rows:
-        for col in columns:
-            seat_id = f"{row}{col}"
-            if col == 'aisle':
-                seating[seat_id] = 'X'
-            elif row in (79, 80) and col in ('D', 'E', 'F'):
-                seating[seat_id] = 'S'
-            else:
-                seating[seat_id] = 'F'
-    return seating
+    return SeatMap(get_template("standard"))
 
 def check_availability(seating, seat_id):
     """
@@ -36,93 +37,106 @@ def check_availability(seating, seat_id):
     """
     if seat_id not in seating:
         return f"Seat {seat_id} does not exist."
-    status = seating[seat_id]
-    if status == 'F':
+    state = seating.state(seat_id)
+    if state == FREE:
         return f"Seat {seat_id} is available for booking."
-    elif status == 'A':
+    elif state == BOOKED:
         return f"Seat {seat_id} is already booked."
-    elif status == 'X':
+    elif state == AISLE:
         return f"Seat {seat_id} is an aisle and is not bookable."
-    elif status == 'S':
+    elif state == STORAGE:
         return f"Seat {seat_id} is a storage area and is not bookable."
+    elif state == HELD:
+        return f"Seat {seat_id} is on hold and is not bookable."
     else:
         return f"Seat {seat_id} has an unknown status."
 
+@instrument("book_seat")
 def book_seat(seating, seat_id):
     """
-    Books a seat if it is available (status 'F').
-    If booking is successful, the seat is updated to 'A'.
+    Books a seat if it is available (state FREE).
+    If booking is successful, the seat moves to the BOOKED state (shown as 'A').
     """
     if seat_id not in seating:
         return f"Seat {seat_id} does not exist."
-    if seating[seat_id] == 'F':
-        seating[seat_id] = 'A'
+    state = seating.state(seat_id)
+    if state == FREE and seating.apply({seat_id: "book"}):
         return f"Seat {seat_id} has been successfully booked."
-    elif seating[seat_id] == 'X':
+    elif state == AISLE:
         return f"Seat {seat_id} is an aisle and cannot be booked."
-    elif seating[seat_id] == 'S':
+    elif state == STORAGE:
         return f"Seat {seat_id} is a storage area and cannot be booked."
+    elif state == HELD:
+        return f"Seat {seat_id} is on hold and cannot be booked."
     else:
         return f"Seat {seat_id} is already booked."
 
+@instrument("free_seat")
 def free_seat(seating, seat_id):
     """
-    Frees a booked seat (status 'A'), marking it as available ('F').
+    Frees a booked seat (state BOOKED), marking it as available ('F').
     """
     if seat_id not in seating:
         return f"Seat {seat_id} does not exist."
-    if seating[seat_id] == 'A':
-        seating[seat_id] = 'F'
+    state = seating.state(seat_id)
+    if state == BOOKED and seating.apply({seat_id: "free"}):
         return f"Seat {seat_id} has been freed and is now available."
-    elif seating[seat_id] == 'X':
+    elif state == AISLE:
         return f"Seat {seat_id} is an aisle and cannot be freed."
-    elif seating[seat_id] == 'S':
+    elif state == STORAGE:
         return f"Seat {seat_id} is a storage area and cannot be freed."
+    elif state == HELD:
+        return f"Seat {seat_id} is on hold and cannot be freed."
     else:
         return f"Seat {seat_id} is already free."
 
+@instrument("modify_booking")
 def modify_booking(seating, current_seat, new_seat):
     """
     Modifies a booking by changing from current_seat to new_seat.
-    Checks that current_seat is booked ('A') and new_seat is available ('F').
-    If conditions are met, frees the current seat and books the new seat.
+    Checks that current_seat is booked and new_seat is available.
+    If conditions are met, frees the current seat and books the new seat in one atomic commit.
     """
     if current_seat not in seating or new_seat not in seating:
         return "One or both seat IDs do not exist."
-    if seating[current_seat] != 'A':
+    if seating.state(current_seat) != BOOKED:
         return f"Current seat {current_seat} is not booked."
-    if seating[new_seat] != 'F':
+    if seating.state(new_seat) != FREE:
         return f"New seat {new_seat} is not available for booking."
-    seating[current_seat] = 'F'
-    seating[new_seat] = 'A'
+    # Only move the booking if neither seat was changed by another writer since the checks above
+    if not seating.apply({current_seat: "free", new_seat: "book"}):
+        return f"Seat {current_seat} or {new_seat} was changed by another booking, please try again."
     return f"Booking modified: changed from {current_seat} to {new_seat}."
 
 def show_booking_status(seating):
     """
     Prints the current seating chart in a formatted way.
     The chart displays rows 1 to 80 with columns: A, B, C, (blank for aisle), D, E, F.
+    Rendered rows are cached and only rows changed since the last call are rendered again.
     """
-    columns = ['A', 'B', 'C', 'aisle', 'D', 'E', 'F']
-    # Replace "aisle" with a blank in the header.
-    header_columns = [col if col != 'aisle' else "" for col in columns]
-    
-    print("\nCurrent Booking Status:")
-    header = "    " + "   ".join(header_columns)
-    print(header)
-    for row in range(1, 81):
-        row_seats = []
-        for col in columns:
-            seat_id = f"{row}{col}"
-            row_seats.append(seating[seat_id])
-        print(f"{row:>3} " + "   ".join(row_seats))
-    print()  # Blank line for spacing
+    write_chart(seating, "status")
+
+# Commands accepted in batch mode, e.g. "book 2B" or "modify 2B 3C"
+BATCH_COMMANDS = {
+    "check": check_availability,
+    "book": book_seat,
+    "free": free_seat,
+    "modify": modify_booking,
+}
 
 def main():
     """
     Main function to run the seat booking application with modify booking functionality.
     Displays a welcome message and a menu for user input.
     """
-    seating = initialize_seating()
+    # Bookings made in earlier runs are recovered from the journal, which then records every change
+    journal = Journal(JOURNAL_FILE)
+    seating = journal.recover(initialize_seating())
+    # Batch mode: python <this file> --batch [commands file], reading standard input by default
+    if len(sys.argv) > 1 and sys.argv[1] == "--batch":
+        run_batch_file(seating, BATCH_COMMANDS, sys.argv[2] if len(sys.argv) > 2 else "-", normalize=str.upper)
+        journal.close()
+        return
     # Lower the welcome text by adding extra newlines for improved visibility.
     print("Welcome to the Apache Airlines Seat Booking Application!")
     print("We are glad to have you here. Please follow the menu options below to manage your booking.\n\n")
@@ -155,6 +169,7 @@ def main():
             new_seat = input("Enter the new seat ID you want (e.g., 3A): ").strip().upper()
             print(modify_booking(seating, current_seat, new_seat))
         elif choice == '6':
+            journal.close()
             print("Thank you for using the Apache Airlines Seat Booking Application. Goodbye!")
             break
         else:
@@ -0,0 +1,33 @@
+# FC723 Project – Seat Booking Application
+
+# Loader for the task scripts.
+
+# The task scripts have spaces in their file names ("task 1B.py"), so they cannot be imported
+# with a normal import statement. This helper loads them as modules so that tools such as the
+# booking server can reuse their booking functions.
+
+import importlib.util
+import os
+import re
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_task(filename):
+    """
+    Loads a task script (e.g. "task 1B.py") from the project folder and returns it as a module.
+    The script's menu is not started, and each script is only loaded once.
+    """
+    name = "task_" + re.sub(r"\W", "_", os.path.splitext(filename)[0]).lower()
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, os.path.join(PROJECT_DIR, filename))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[name]
+            raise
+    return module